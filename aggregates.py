@@ -0,0 +1,253 @@
+from datetime import timedelta
+from plan_model import DONE, EMPTY, load_plan
+from plan_store import get_plan_store
+from state_store import get_state
+from hard_topics import normalize, week_key
+
+# ================= ROLLING AGGREGATES =================
+# The whole-history numbers of each plan (consistency, best streak, study
+# score, per-month counts, hard topic counts) kept as running totals that
+# every recorded answer updates in O(1), instead of a pass over all rows
+# per report. They are saved with the bot state under
+# "aggregates:<plan path>":
+#
+#   total / done / score    marked days, done days, study score points
+#   months                  "YYYY-MM" -> [done, marked]
+#   hard                    hard topic (normalized) -> days; labels has the
+#                           first spelling seen
+#   run                     [first date, last date, length] of the latest
+#                           run of done days; best_closed is the longest
+#                           run before it
+#   latest                  last marked date
+#   signature               the plan store import they were built from
+#   format                  AGGREGATES_FORMAT they were built with
+#
+# The same topic counts per ISO week and per month are kept under keys of
+# their own, "aggregates:<plan path>:week:2026-W42" / ":month:2026-10", so
+# an answer rewrites only the buckets it touches.
+#
+# Answers only ever land on the newest day, which is what keeps the streak
+# incremental; anything else (an answer for an older day, a re-imported
+# plan) rebuilds them from the plan.
+
+
+AGGREGATES_FORMAT = 2
+
+
+def aggregates_key(path):
+    return f"aggregates:{path}"
+
+
+def _points(status, hard):
+    # same rule as the study score in analytics.compute_metrics
+    if status != DONE:
+        return 0
+    return 10 - (2 if hard.lower() != "none" else 0)
+
+
+def _is_hard(hard):
+    return bool(hard) and hard.lower() != "none"
+
+
+def _month(d):
+    return f"{d.year}-{d.month:02d}"  # "%Y-%m", strftime is slow in recompute
+
+
+def _count(counts, key, n):
+    value = counts.get(key, 0) + n
+    if value:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+def hard_bucket_key(path, kind, d):
+    # kind "week" (ISO week) or "month": the bucket of the period holding d
+    period = week_key(d) if kind == "week" else _month(d)
+    return f"{aggregates_key(path)}:{kind}:{period}"
+
+
+def hard_bucket(path, kind, d):
+    return get_state().get(hard_bucket_key(path, kind, d), {})
+
+
+def _count_hard(agg, buckets, path, d, hard, n, fresh=False):
+    # buckets: state key -> counts being built (fresh) or copies of the
+    # saved ones being changed
+    key = normalize(hard)
+    if n > 0:
+        agg["labels"].setdefault(key, hard)
+    _count(agg["hard"], key, n)
+    if key not in agg["hard"]:
+        agg["labels"].pop(key, None)
+    if not d:
+        return
+    for kind in ("week", "month"):
+        bucket = hard_bucket_key(path, kind, d)
+        counts = buckets.get(bucket)
+        if counts is None:
+            counts = buckets[bucket] = {} if fresh else dict(get_state().get(bucket, {}))
+        _count(counts, key, n)
+
+
+def recompute(plan):
+    # (aggregates, hard topic buckets) from every row of the plan
+    agg = {
+        "format": AGGREGATES_FORMAT,
+        "signature": plan.signature,
+        "total": 0, "done": 0, "score": 0,
+        "months": {}, "hard": {}, "labels": {},
+        "run": None, "best_closed": 0, "latest": None,
+    }
+    buckets = {}
+    months = agg["months"]
+    run, cur = None, 0
+    for row in plan.rows:
+        iso = row.date and row.date.isoformat()
+        if row.status == DONE:
+            if cur == 0:
+                if run:
+                    agg["best_closed"] = max(agg["best_closed"], run[2])
+                run = [iso, iso, 0]
+            cur += 1
+            run[1], run[2] = iso, cur
+        else:
+            cur = 0
+        if row.status != EMPTY:
+            agg["total"] += 1
+            agg["done"] += row.status == DONE
+            agg["score"] += _points(row.status, row.hard)
+            if iso:
+                bucket = months.setdefault(_month(row.date), [0, 0])
+                bucket[0] += row.status == DONE
+                bucket[1] += 1
+                agg["latest"] = max(agg["latest"] or iso, iso)
+        if _is_hard(row.hard):
+            _count_hard(agg, buckets, plan.path, row.date, row.hard, 1, fresh=True)
+    agg["run"] = run
+    return agg, buckets
+
+
+def best_streak(agg):
+    run = agg["run"]
+    return max(agg["best_closed"], run[2] if run else 0)
+
+
+def _save(path, agg, buckets, rebuilt=False):
+    # one transaction; emptied buckets and, after a rebuild, buckets the
+    # plan no longer has are dropped
+    state = get_state()
+    values = {aggregates_key(path): agg}
+    values.update((key, counts) for key, counts in buckets.items() if counts)
+    state.update(values)
+    stale = [key for key, counts in buckets.items() if not counts]
+    if rebuilt:
+        stale += [key for key in state.keys(aggregates_key(path) + ":") if key not in buckets]
+    for key in stale:
+        state.delete(key)
+    return agg
+
+
+def rebuild_aggregates(plan):
+    agg, buckets = recompute(plan)
+    return _save(plan.path, agg, buckets, rebuilt=True)
+
+
+def _current(agg, signature):
+    return (
+        agg is not None
+        and agg.get("format") == AGGREGATES_FORMAT
+        and agg["signature"] == signature
+    )
+
+
+def plan_aggregates(plan):
+    agg = get_state().get(aggregates_key(plan.path))
+    if not _current(agg, plan.signature):
+        agg = rebuild_aggregates(plan)
+    return agg
+
+
+def summary(agg):
+    # what the reports read from the aggregates. Compared instead of the
+    # dicts themselves: the incremental layout can differ from recompute's
+    # without any number being off (after a done answer that began a new
+    # run is undone, run is None where recompute keeps the run before it,
+    # which best_closed already counts; a month can be left at [0, 0]).
+    months = {key: counts for key, counts in agg["months"].items() if any(counts)}
+    return agg["total"], agg["done"], agg["score"], months, agg["hard"], agg["labels"], best_streak(agg)
+
+
+def aggregates_match(plan):
+    # the saved totals against a full recomputation; only reads, so it can
+    # run off the event loop
+    state = get_state()
+    saved = state.get(aggregates_key(plan.path))
+    if not _current(saved, plan.signature):
+        return False
+    agg, buckets = recompute(plan)
+    if summary(saved) != summary(agg):
+        return False
+    return {key: state.get(key) for key in state.keys(aggregates_key(plan.path) + ":")} == buckets
+
+
+def _streak(agg, d, done):
+    # moves the latest run for a done / not done answer on day d; False
+    # when d is not the newest day and only a rebuild can tell
+    iso = d.isoformat()
+    latest = agg["latest"]
+    run = agg["run"]
+    if latest is not None and iso < latest:
+        return False
+    if run and run[1] is None:
+        return False
+    if done:
+        if run and run[1] == iso:
+            return True
+        if run and run[1] == (d - timedelta(days=1)).isoformat():
+            agg["run"] = [run[0], iso, run[2] + 1]
+        else:
+            if run:
+                agg["best_closed"] = max(agg["best_closed"], run[2])
+            agg["run"] = [iso, iso, 1]
+    elif run and run[1] == iso:
+        if run[2] == 1:
+            agg["run"] = None  # the run before it is already in best_closed
+        else:
+            agg["run"] = [run[0], (d - timedelta(days=1)).isoformat(), run[2] - 1]
+    return True
+
+
+def record_change(path, old, new):
+    # old / new: the PlanRow before and after one recorded answer
+    agg = get_state().get(aggregates_key(path))
+    if not _current(agg, get_plan_store().signature(path)):
+        plan_aggregates(load_plan(path))
+        return
+    # a new dict: state values are never changed in place
+    agg = dict(agg, months=dict(agg["months"]), hard=dict(agg["hard"]), labels=dict(agg["labels"]))
+
+    if (old.status == DONE) != (new.status == DONE):
+        if not _streak(agg, new.date, new.status == DONE):
+            rebuild_aggregates(load_plan(path))
+            return
+
+    marked = (new.status != EMPTY) - (old.status != EMPTY)
+    done = (new.status == DONE) - (old.status == DONE)
+    agg["total"] += marked
+    agg["done"] += done
+    agg["score"] += _points(new.status, new.hard) - _points(old.status, old.hard)
+    if marked or done:
+        key = _month(new.date)
+        bucket = agg["months"].get(key, [0, 0])
+        agg["months"][key] = [bucket[0] + done, bucket[1] + marked]
+    if new.status != EMPTY:
+        iso = new.date.isoformat()
+        agg["latest"] = max(agg["latest"] or iso, iso)
+
+    buckets = {}
+    if _is_hard(old.hard):
+        _count_hard(agg, buckets, path, old.date, old.hard, -1)
+    if _is_hard(new.hard):
+        _count_hard(agg, buckets, path, new.date, new.hard, 1)
+    _save(path, agg, buckets)
@@ -0,0 +1,188 @@
+import functools
+from collections import Counter
+from datetime import timedelta
+from plan_model import DONE, MISS, EMPTY
+from aggregates import best_streak
+from hard_topics import normalize
+
+# ================= ANALYTICS ENGINE =================
+# Every weekly / monthly number the reports need, filled in one pass over
+# the plan rows. monday_bundle computes this once and hands it to each
+# send_* function.
+
+
+class PlanMetrics:
+    __slots__ = (
+        "today", "start", "end",
+        "week_start", "r30_start", "lm_start", "lm_end", "pm_start", "pm_end",
+        # last 7 / 30 days
+        "week_done", "week_miss", "week_hard", "week_points",
+        "r30_done", "r30_miss",
+        # last / previous calendar month
+        "month_points", "lm_done", "pm_done",
+        # whole range
+        "total", "done", "best_streak", "score", "max_score", "hard_counts",
+    )
+
+    def __init__(self, today, start=None, end=None):
+        self.today = today
+        self.start = start
+        self.end = end
+        self.week_start = today - timedelta(days=6)
+        self.r30_start = today - timedelta(days=29)
+        self.lm_end = today.replace(day=1) - timedelta(days=1)
+        self.lm_start = self.lm_end.replace(day=1)
+        self.pm_end = self.lm_start - timedelta(days=1)
+        self.pm_start = self.pm_end.replace(day=1)
+
+        self.week_done = self.week_miss = 0
+        self.week_hard = []
+        self.week_points = []
+        self.r30_done = self.r30_miss = 0
+        self.month_points = []
+        self.lm_done = self.pm_done = 0
+        self.total = self.done = 0
+        self.best_streak = 0
+        self.score = self.max_score = 0
+        self.hard_counts = Counter()
+
+    @property
+    def consistency(self):
+        if not self.total:
+            return None
+        return self.done / self.total * 100
+
+    @property
+    def rolling_7(self):
+        marked = self.week_done + self.week_miss
+        return self.week_done / marked * 100 if marked else None
+
+    @property
+    def rolling_30(self):
+        marked = self.r30_done + self.r30_miss
+        return self.r30_done / marked * 100 if marked else None
+
+    @property
+    def study_score(self):
+        if not self.max_score:
+            return None
+        return self.score / self.max_score * 100
+
+    @property
+    def trend(self):
+        if self.lm_done > self.pm_done:
+            return "📈 Improved"
+        if self.lm_done < self.pm_done:
+            return "📉 Declined"
+        return "➖ Same"
+
+
+@functools.lru_cache(maxsize=None)
+def _columnar():
+    # imported on first use: reports served from the aggregates never need
+    # numpy, so the bot does not load it at startup
+    try:
+        from plan_columns import fill_metrics
+    except ImportError:  # numpy missing, use the pure Python pass
+        return None
+    return fill_metrics
+
+
+def compute_metrics(rows, today, start=None, end=None, columnar=True):
+    # start / end bound the whole-history numbers (consistency, streak,
+    # score, hard topics); None means all rows
+    m = PlanMetrics(today, start, end)
+    fill_columnar = _columnar() if columnar else None
+    if fill_columnar is not None:
+        return fill_columnar(m, rows)
+    cur = 0
+    labels = {}  # normalized topic -> first spelling seen
+
+    for row in rows:
+        d = row.date
+        status = row.status
+        hard = row.hard
+        is_hard = bool(hard) and hard.lower() != "none"
+
+        if d:
+            if m.week_start <= d <= today:
+                if status == DONE:
+                    m.week_done += 1
+                elif status == MISS:
+                    m.week_miss += 1
+                if is_hard:
+                    m.week_hard.append((d, hard))
+                m.week_points.append((d, 1 if status == DONE else 0))
+            if m.r30_start <= d <= today:
+                if status == DONE:
+                    m.r30_done += 1
+                elif status == MISS:
+                    m.r30_miss += 1
+            if m.lm_start <= d <= m.lm_end:
+                m.month_points.append((d, 1 if status == DONE else 0))
+                if status == DONE:
+                    m.lm_done += 1
+            elif m.pm_start <= d <= m.pm_end and status == DONE:
+                m.pm_done += 1
+
+        if start and not (d and d >= start):
+            continue
+        if end and not (d and d <= end):
+            continue
+
+        if status == DONE:
+            cur += 1
+            if cur > m.best_streak:
+                m.best_streak = cur
+        else:
+            cur = 0
+
+        if status != EMPTY:
+            m.total += 1
+            m.max_score += 10
+            if status == DONE:
+                m.done += 1
+                m.score += max(10 - (2 if hard.lower() != "none" else 0), 0)
+
+        if is_hard:
+            m.hard_counts[labels.setdefault(normalize(hard), hard)] += 1
+
+    return m
+
+
+def metrics_from_aggregates(plan, agg, today):
+    # the same numbers without a pass over the whole history: the 7 / 30
+    # day and last-month windows come from the date index (a month of rows
+    # at most), everything else from the plan's running aggregates
+    m = PlanMetrics(today)
+    for row in plan.iter_range(m.r30_start, today):
+        d, status, hard = row.date, row.status, row.hard
+        if status == DONE:
+            m.r30_done += 1
+        elif status == MISS:
+            m.r30_miss += 1
+        if d >= m.week_start:
+            if status == DONE:
+                m.week_done += 1
+            elif status == MISS:
+                m.week_miss += 1
+            if hard and hard.lower() != "none":
+                m.week_hard.append((d, hard))
+            m.week_points.append((d, 1 if status == DONE else 0))
+    m.month_points = [
+        (row.date, 1 if row.status == DONE else 0)
+        for row in plan.iter_range(m.lm_start, m.lm_end)
+    ]
+
+    months = agg["months"]
+    m.lm_done = months.get(m.lm_start.strftime("%Y-%m"), (0, 0))[0]
+    m.pm_done = months.get(m.pm_start.strftime("%Y-%m"), (0, 0))[0]
+    m.total = agg["total"]
+    m.done = agg["done"]
+    m.score = agg["score"]
+    m.max_score = 10 * m.total
+    m.best_streak = best_streak(agg)
+    # spellings of one topic are counted together, under its first spelling
+    labels = agg["labels"]
+    m.hard_counts = Counter({labels[key]: n for key, n in agg["hard"].items()})
+    return m
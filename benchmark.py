@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import copy
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# ================= BENCHMARK =================
+# Times the hot paths against synthetic plans of 1..5 years:
+#
+#   python benchmark.py --years 1 3 5 --repeat 5 --out bench.json
+#   python benchmark.py --compare bench.json       # exit 1 on regressions
+#
+# Runs offline: everything persistent goes to a scratch DATA_DIR, Drive
+# uploads are stubbed and messages go to the recording FakeBot. Telegram
+# rate limits are lifted so the numbers are the bot's own.
+ROWS_PER_TABLE = 7
+TOPICS = (
+    "Pointers", "Recursion", "Linked Lists", "Trees", "Graphs", "Dynamic Programming",
+    "Sorting", "Hashing", "Bit Manipulation", "Strings", "Stacks", "Queues",
+)
+REGRESSION_THRESHOLD = 1.2  # median slower than this factor counts as a regression
+
+
+# ================= SYNTHETIC PLANS =================
+def generate_plan(path, years, today, template, seed=1):
+    # one table per week from a copy of the template's first table, dated so
+    # the plan runs through today and one more month
+    from docx import Document
+    from docx.table import Table
+    from plan_model import find_headers
+
+    rnd = random.Random(seed)
+    doc = Document(template)
+    proto = doc.tables[0]
+    headers, header_idx = find_headers(proto)
+    proto_tbl = copy.deepcopy(proto._tbl)
+    # trim the prototype to header + one week
+    for tr in proto_tbl.tr_lst[header_idx + 1 + ROWS_PER_TABLE:]:
+        proto_tbl.remove(tr)
+    while len(proto_tbl.tr_lst) < header_idx + 1 + ROWS_PER_TABLE:
+        proto_tbl.append(copy.deepcopy(proto_tbl.tr_lst[-1]))
+
+    body = proto._tbl.getparent()
+    for table in list(doc.tables):
+        body.remove(table._tbl)
+    anchor = body[-1]  # section properties stay last
+
+    start = today - timedelta(days=365 * years) + timedelta(days=30)
+    weeks = (365 * years + 6) // 7
+    day = 1
+    for _ in range(weeks):
+        tbl = copy.deepcopy(proto_tbl)
+        anchor.addprevious(tbl)
+        table = Table(tbl, doc._body)
+        for row in table.rows[header_idx + 1:]:
+            cells = row.cells
+            d = start + timedelta(days=day - 1)
+            values = {
+                "date": d.isoformat(),
+                "c topic": rnd.choice(TOPICS),
+                "java topic": rnd.choice(TOPICS),
+                "status": "",
+                "hard topic": "",
+            }
+            if "day" in headers:
+                values["day"] = str(day)
+            if d <= today:
+                values["status"] = rnd.choice(("✅", "✅", "✅", "❌", ""))
+                values["hard topic"] = rnd.choice(("None", "", "None") + TOPICS)
+            for column, value in values.items():
+                cells[headers[column]].text = value
+            day += 1
+    doc.save(path)
+    return day - 1
+
+
+# ================= TIMING =================
+class Timings:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = {}
+
+    async def measure(self, name, fn, setup=None):
+        runs = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            result = fn()
+            if asyncio.iscoroutine(result):
+                await result
+            runs.append((time.perf_counter() - started) * 1000)
+        self.results[name] = {
+            "min_ms": round(min(runs), 3),
+            "median_ms": round(statistics.median(runs), 3),
+            "mean_ms": round(statistics.fmean(runs), 3),
+            "max_ms": round(max(runs), 3),
+            "runs": len(runs),
+        }
+        print(f"  {name:<28} median {self.results[name]['median_ms']:>10.2f} ms")
+
+
+SEND_FUNCTIONS = (
+    "send_weekly_report",
+    "send_monthly_report",
+    "send_sunday_summary",
+    "send_weekly_graph",
+    "send_monthly_graph",
+    "send_consistency_score",
+    "send_best_streak",
+    "send_study_score",
+    "send_hard_topic_analytics",
+    "send_month_comparison",
+    "send_ai_motivation",
+)
+
+
+async def bench_plan(user, repeat):
+    import plan_model
+    import reports
+    import scheduler
+    from aggregates import plan_aggregates, recompute
+    from analytics import compute_metrics, metrics_from_aggregates
+    from fake_bot import FakeContext
+    from hard_topics import topic_index
+    from report_cache import report_cache
+
+    t = Timings(repeat)
+    path = user.plan_path
+    today = datetime.now(scheduler.IST).date()
+
+    def cold():
+        plan_model._PLANS.pop(path, None)
+
+    await t.measure("import_plan", lambda: plan_model.import_plan(path))
+    await t.measure("load_plan_cold", lambda: plan_model.load_plan(path), setup=cold)
+    await t.measure("load_plan_cached", lambda: plan_model.load_plan(path))
+    plan = plan_model.load_plan(path)
+    await t.measure("compute_metrics", lambda: compute_metrics(plan.rows, today))
+    await t.measure("recompute_aggregates", lambda: recompute(plan))
+    agg = plan_aggregates(plan)  # saved once, the runs below only read them
+    await t.measure("metrics_from_aggregates", lambda: metrics_from_aggregates(
+        plan, plan_aggregates(plan), today
+    ))
+    await t.measure("hard_topic_search", lambda: topic_index(path, agg["hard"]).search(
+        "ree", agg["hard"], agg["labels"]
+    ))
+    await t.measure("generate_pdf_week", lambda: reports.generate_pdf(
+        today - timedelta(days=6), today, "Weekly Study Report", path
+    ))
+    await t.measure("generate_pdf_all", lambda: reports.generate_pdf(
+        plan.index.dates[0], plan.index.dates[-1], "Full Report", path
+    ))
+
+    # report caches are emptied before every run so each send renders
+    ctx = FakeContext()
+    for name in SEND_FUNCTIONS:
+        send = getattr(reports, name)
+        await t.measure(name, lambda: send(ctx, user), setup=report_cache.clear)
+
+    await t.measure("update_status_in_word", lambda: scheduler.update_status_in_word(user, "✅"))
+    await t.measure("flush_document", lambda: scheduler.flush_document(path),
+                    setup=lambda: scheduler.update_status_in_word(user, "❌"))
+    await t.measure("run_bundle_monday", lambda: reports.run_bundle(
+        ctx.bot, user, reports.MONDAY_BUNDLE
+    ), setup=report_cache.clear)
+    return t.results
+
+
+async def run(args, data_dir):
+    # imported only now: config reads DATA_DIR at import time
+    import render_pool
+    import reports
+    import scheduler
+    from broadcast import TokenBucket, broadcaster
+    from config import PLAN_TEMPLATE
+    from drive_sync import sync_worker
+    from fake_bot import FakeContext
+    from report_cache import report_cache
+    from users import get_registry
+
+    uploads = []
+    sync_worker.upload = lambda local_path, filename, retries=1: uploads.append(filename) or True
+    sync_worker.min_interval = 0
+    sync_worker.start()
+    broadcaster.bucket = TokenBucket(1e9, 1e9)
+    broadcaster.per_chat_rate = broadcaster.per_chat_burst = 1e9
+    broadcaster._chats.clear()
+    render_pool.warm_up()
+
+    today = datetime.now(scheduler.IST).date()
+    registry = get_registry()
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "render_workers": render_pool.RENDER_WORKERS,
+        },
+        "plans": {},
+    }
+    for years in args.years:
+        path = os.path.join(data_dir, f"bench_{years}y.docx")
+        print(f"📄 {years} year plan")
+        started = time.perf_counter()
+        rows = generate_plan(path, years, today, PLAN_TEMPLATE)
+        print(f"  generated {rows} rows in {time.perf_counter() - started:.1f}s")
+        start = today - timedelta(days=365 * years) + timedelta(days=30)
+        user = registry.add(years, path, start, f"bench_{years}y.docx")
+        report["plans"][f"{years}y"] = {
+            "rows": rows,
+            "tables": (rows + ROWS_PER_TABLE - 1) // ROWS_PER_TABLE,
+            "docx_bytes": os.path.getsize(path),
+            "timings": await bench_plan(user, args.repeat),
+        }
+
+    # the whole cohort tick: every benchmark plan gets its Monday bundle
+    ctx = FakeContext()
+    t = Timings(args.repeat)
+    await t.measure("monday_bundle", lambda: reports.monday_bundle(ctx), setup=report_cache.clear)
+    report["cohort"] = {"users": len(registry.all()), "timings": t.results}
+    report["meta"]["messages_sent"] = len(ctx.bot.sent)
+    report["meta"]["drive_uploads_stubbed"] = len(uploads)
+
+    sync_worker.stop()
+    render_pool.shutdown()
+    return report
+
+
+# ================= COMPARE =================
+def _medians(report):
+    out = {}
+    for plan, data in report.get("plans", {}).items():
+        for name, timing in data["timings"].items():
+            out[f"{plan}/{name}"] = timing["median_ms"]
+    for name, timing in report.get("cohort", {}).get("timings", {}).items():
+        out[f"cohort/{name}"] = timing["median_ms"]
+    return out
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    old_m, new_m = _medians(old), _medians(new)
+    regressions = []
+    print(f"{'benchmark':<40} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    for name in sorted(old_m.keys() & new_m.keys()):
+        ratio = new_m[name] / old_m[name] if old_m[name] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  ❌"
+        print(f"{name:<40} {old_m[name]:>10.2f} {new_m[name]:>10.2f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the placement bot's hot paths")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3, 5], choices=range(1, 6))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="benchmark.json")
+    parser.add_argument("--compare", metavar="BASELINE_JSON",
+                        help="compare the new run with an earlier JSON result")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    # read the baseline first: --out may name the same file
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory(prefix="plan-bench-") as data_dir:
+        os.environ["DATA_DIR"] = data_dir
+        os.environ["CHAT_ID"] = ""  # no owner plan, only the benchmark users
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        report = asyncio.run(run(args, data_dir))
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.out}")
+
+    if baseline is not None:
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions over {args.threshold}x")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+# spawned render workers import this file as __mp_main__, only a real run
+# may start the benchmark
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import asyncio
+import functools
+import logging
+import os
+import time
+from telegram.error import RetryAfter
+from metrics import registry
+
+# ================= BROADCAST =================
+# Every outgoing Telegram call goes through one Broadcaster. It keeps the
+# bot under Telegram's flood limits with token buckets (one global, one per
+# chat), sends fan-outs concurrently up to a limit, and on RetryAfter holds
+# *all* sending for the time Telegram asked for before trying again.
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))  # messages / second, whole bot
+PER_CHAT_RATE = 1.0  # messages / second to one chat ...
+PER_CHAT_BURST = 3   # ... after a short burst (a report bundle)
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "16"))
+MAX_CHAT_BUCKETS = 4096
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        # 0 when a token was taken, otherwise seconds until one is available
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def idle(self):
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class BroadcastStats:
+    __slots__ = ("sent", "failed", "retries", "throttled", "last_size", "last_seconds")
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0         # RetryAfter answers from Telegram
+        self.throttled = 0.0     # seconds spent waiting for tokens
+        self.last_size = 0
+        self.last_seconds = 0.0
+
+    @property
+    def last_rate(self):
+        # messages / second of the last broadcast
+        if not self.last_seconds:
+            return None
+        return self.last_size / self.last_seconds
+
+    def snapshot(self):
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "throttled_seconds": round(self.throttled, 3),
+            "last_broadcast_size": self.last_size,
+            "last_broadcast_seconds": round(self.last_seconds, 3),
+            "last_broadcast_rate": self.last_rate and round(self.last_rate, 2),
+        }
+
+
+class Broadcaster:
+    def __init__(self, rate=BROADCAST_RATE, per_chat_rate=PER_CHAT_RATE,
+                 per_chat_burst=PER_CHAT_BURST, concurrency=BROADCAST_CONCURRENCY,
+                 retries=3):
+        self.bucket = TokenBucket(rate, max(1, rate))
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.concurrency = concurrency
+        self.retries = retries
+        self.stats = BroadcastStats()
+        self._chats = {}
+        self._paused_until = 0.0
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_CHAT_BUCKETS:
+                # full buckets carry no state, they are safe to forget
+                for key in [k for k, b in self._chats.items() if b.idle()]:
+                    del self._chats[key]
+            bucket = self._chats[chat_id] = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+        return bucket
+
+    async def _wait(self, bucket):
+        while True:
+            # a flood pause first: a token taken now would be wasted
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                delay = bucket.take()
+                if delay <= 0:
+                    return
+            self.stats.throttled += delay
+            await asyncio.sleep(delay)
+
+    async def _acquire(self, chat_id):
+        await self._wait(self._chat_bucket(chat_id))
+        await self._wait(self.bucket)
+
+    async def send(self, bot, method, chat_id, **kwargs):
+        call = getattr(bot, method)
+        for attempt in range(1, self.retries + 1):
+            await self._acquire(chat_id)
+            try:
+                result = await call(chat_id=chat_id, **kwargs)
+            except RetryAfter as e:
+                self.stats.retries += 1
+                if attempt == self.retries:
+                    self.stats.failed += 1
+                    raise
+                # flood control is per bot, everyone waits
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                logging.warning("Telegram flood limit, pausing sends for %ss", e.retry_after)
+                continue
+            except Exception:
+                self.stats.failed += 1
+                raise
+            self.stats.sent += 1
+            return result
+
+    async def broadcast(self, bot, chat_ids, method="send_message", **kwargs):
+        # same message to many chats; returns [(chat_id, message or exception)]
+        limit = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+
+        async def one(chat_id):
+            async with limit:
+                try:
+                    return chat_id, await self.send(bot, method, chat_id, **kwargs)
+                except Exception as e:
+                    logging.warning("Broadcast to chat %s failed: %s", chat_id, e)
+                    return chat_id, e
+
+        results = await asyncio.gather(*(one(chat_id) for chat_id in chat_ids))
+        self.stats.last_size = len(results)
+        self.stats.last_seconds = time.monotonic() - started
+        if results:
+            logging.info(
+                "Broadcast of %s messages took %.2fs (%s failed, %s retries so far)",
+                len(results),
+                self.stats.last_seconds,
+                sum(isinstance(r, Exception) for _, r in results),
+                self.stats.retries,
+            )
+        return results
+
+
+broadcaster = Broadcaster()
+for _field, _help in (
+    ("sent", "Telegram messages sent"),
+    ("failed", "Telegram sends that failed"),
+    ("retries", "RetryAfter answers from Telegram"),
+    ("throttled", "Seconds senders waited on the rate limits"),
+):
+    registry.gauge(
+        f"telegram_{_field}_total", _help,
+        functools.partial(getattr, broadcaster.stats, _field), kind="counter",
+    )
+registry.gauge(
+    "telegram_last_broadcast_seconds", "Duration of the last fan-out",
+    lambda: broadcaster.stats.last_seconds,
+)
@@ -0,0 +1,71 @@
+import hashlib
+import io
+from collections import OrderedDict
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import AutoLocator, ScalarFormatter
+
+# ================= CHARTS =================
+# Progress charts drawn with the object-oriented Figure / Agg canvas API.
+# One pre-styled figure per chart kind stays alive and only its line data
+# is swapped, and PNGs are cached by a hash of what they show. Each render
+# process keeps its own figures and cache.
+PNG_CACHE_SIZE = 32
+
+
+class ChartRenderer:
+    def __init__(self, cache_size=PNG_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._figures = {}
+        self._pngs = OrderedDict()
+
+    def _figure(self, kind):
+        if kind not in self._figures:
+            fig = Figure()
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot()
+            (line,) = ax.plot([], [], marker="o")
+            ax.set_yticks([0, 1], ["Miss", "Done"])
+            ax.grid(True)
+            self._figures[kind] = (fig, ax, line)
+        return self._figures[kind]
+
+    def _draw(self, kind, x, y, title):
+        fig, ax, line = self._figure(kind)
+
+        if x and isinstance(x[0], str):
+            # category labels (weekday names) sit at 0..n-1
+            positions = list(range(len(x)))
+            ax.set_xticks(positions, x)
+        else:
+            positions = x
+            ax.xaxis.set_major_locator(AutoLocator())
+            ax.xaxis.set_major_formatter(ScalarFormatter())
+
+        line.set_data(positions, y)
+        ax.relim()
+        ax.autoscale_view()
+        ax.set_title(title)
+
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+        return buf.getvalue()
+
+    def render(self, kind, x, y, title):
+        key = hashlib.sha1(repr((kind, title, list(x), list(y))).encode()).hexdigest()
+        png = self._pngs.get(key)
+        if png is None:
+            png = self._draw(kind, list(x), list(y), title)
+            self._pngs[key] = png
+            if len(self._pngs) > self.cache_size:
+                self._pngs.popitem(last=False)
+        else:
+            self._pngs.move_to_end(key)
+        return png
+
+
+_RENDERER = ChartRenderer()
+
+
+def render_chart(kind, x, y, title):
+    return _RENDERER.render(kind, x, y, title)
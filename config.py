@@ -6,6 +6,18 @@ load_dotenv()
 IST = ZoneInfo("Asia/Kolkata")
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
-CHAT_ID = int(os.getenv("CHAT_ID"))
+# original single-user chat; it keeps WORD_FILE as its plan. Everyone
+# else registers with /start and gets a plan under PLANS_DIR.
+CHAT_ID = int(os.getenv("CHAT_ID")) if os.getenv("CHAT_ID") else None
+START_DATE = "2026-01-12"
 
-WORD_FILE = "/data/placepment_plan.docx"
+# the volume everything persistent lives on; the benchmark points it elsewhere
+DATA_DIR = os.getenv("DATA_DIR", "/data")
+WORD_FILE = os.path.join(DATA_DIR, "placepment_plan.docx")
+JOURNAL_DB = os.path.join(os.path.dirname(WORD_FILE), "plan_edits.db")
+DRIVE_ID_CACHE = os.path.join(os.path.dirname(WORD_FILE), "drive_ids.json")
+USERS_DB = os.path.join(os.path.dirname(WORD_FILE), "users.db")
+STATE_DB = os.path.join(os.path.dirname(WORD_FILE), "bot_state.db")
+PLAN_DB = os.path.join(os.path.dirname(WORD_FILE), "plans.db")
+PLANS_DIR = os.path.join(os.path.dirname(WORD_FILE), "plans")
+PLAN_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "placepment_plan.docx")
@@ -0,0 +1,109 @@
+import zipfile
+from lxml import etree
+
+# ================= DOCX TABLE STREAM =================
+# Reads the text of a .docx file's tables straight from word/document.xml
+# with lxml's iterparse, without building a python-docx Document. Rows are
+# yielded as plain tuples of cell texts and dropped from the tree as soon
+# as they are read, so memory stays flat however long the plan gets.
+#
+# Numbering and text follow python-docx exactly, so (table, row, column)
+# positions can be used with doc.tables[table].rows[row].cells[column]:
+# tables are the body-level <w:tbl>s, a cell spanning n grid columns shows
+# up n times, a vertically merged cell repeats the text of the cell it
+# continues, and cell text is its paragraphs joined by "\n".
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY, _TBL, _TR, _TC = W + "body", W + "tbl", W + "tr", W + "tc"
+_P, _R, _HYPERLINK = W + "p", W + "r", W + "hyperlink"
+_TCPR, _GRID_SPAN, _V_MERGE = W + "tcPr", W + "gridSpan", W + "vMerge"
+_TRPR, _GRID_BEFORE = W + "trPr", W + "gridBefore"
+_VAL, _TYPE = W + "val", W + "type"
+_RUN_TEXT = {W + "tab": "\t", W + "ptab": "\t", W + "cr": "\n", W + "noBreakHyphen": "-"}
+
+
+def _run_text(r):
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == W + "t":
+            parts.append(child.text or "")
+        elif tag == W + "br":
+            # only line breaks are text, page / column breaks are not
+            if child.get(_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag in _RUN_TEXT:
+            parts.append(_RUN_TEXT[tag])
+    return "".join(parts)
+
+
+def _paragraph_text(p):
+    parts = []
+    for child in p:
+        if child.tag == _R:
+            parts.append(_run_text(child))
+        elif child.tag == _HYPERLINK:
+            parts.extend(_run_text(r) for r in child.iterchildren(_R))
+    return "".join(parts)
+
+
+def _cell_text(tc):
+    return "\n".join(_paragraph_text(p) for p in tc.iterchildren(_P))
+
+
+def _int_prop(props, tag, default):
+    if props is None:
+        return default
+    el = props.find(tag)
+    if el is None:
+        return default
+    return int(el.get(_VAL, default))
+
+
+def _row_cells(tr, above):
+    # above: grid offset -> (text, span) of the previous row, for vMerge
+    cells, layout = [], {}
+    offset = _int_prop(tr.find(_TRPR), _GRID_BEFORE, 0)
+    for tc in tr.iterchildren(_TC):
+        props = tc.find(_TCPR)
+        span = _int_prop(props, _GRID_SPAN, 1)
+        merge = props.find(_V_MERGE) if props is not None else None
+        if merge is not None and merge.get(_VAL, "continue") == "continue" and offset in above:
+            text, span = above[offset]
+        else:
+            text = _cell_text(tc)
+        layout[offset] = (text, span)
+        cells.extend([text] * span)
+        offset += span
+    return tuple(cells), layout
+
+
+def iter_table_rows(path):
+    # yields (table index, row index, cell texts) in document order
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as xml:
+        table = -1
+        row = 0
+        above = {}
+        for event, el in etree.iterparse(xml, events=("start", "end"), tag=(_TBL, _TR)):
+            parent = el.getparent()
+            if el.tag == _TBL:
+                if parent is None or parent.tag != _BODY:
+                    continue  # nested table, part of its cell's row
+                if event == "start":
+                    table += 1
+                    row = 0
+                    above = {}
+                else:
+                    el.clear()
+                    # drop the table and the paragraphs before it
+                    while el.getprevious() is not None:
+                        del parent[0]
+                    parent.remove(el)
+                continue
+            if event != "end" or parent.getparent() is None or parent.getparent().tag != _BODY:
+                continue
+            cells, above = _row_cells(el, above)
+            yield table, row, cells
+            row += 1
+            el.clear()
+            while el.getprevious() is not None:
+                del parent[0]
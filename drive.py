@@ -1,66 +1,174 @@
 import os
 import json
 import time
+import hashlib
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from googleapiclient.errors import HttpError
+from config import DRIVE_ID_CACHE
+from metrics import registry
 
 SCOPES = ["https://www.googleapis.com/auth/drive.file"]
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+RESUMABLE_THRESHOLD = 5 * 1024 * 1024  # bigger files go up in resumable chunks
+CHUNK_SIZE = 1024 * 1024
+
+UPLOAD_SECONDS = registry.histogram("drive_upload_seconds", "Drive upload calls, lookups included")
+UPLOAD_SKIPPED = registry.counter("drive_upload_skipped_total", "Uploads skipped, Drive had the same md5")
+UPLOAD_RETRIES = registry.counter("drive_upload_retries_total", "Failed Drive upload attempts")
+UPLOAD_FAILED = registry.counter("drive_upload_failures_total", "Uploads that failed every attempt")
+
+# One long-lived client: credentials and the discovery document are built
+# once and the token is refreshed in place when it expires.
+_SERVICE = None
+_CREDS = None
 
 def get_drive_service():
-    token_info = json.loads(os.environ["TOKEN_JSON"])
-    creds = Credentials.from_authorized_user_info(token_info, SCOPES)
-    return build("drive", "v3", credentials=creds)
+    global _SERVICE, _CREDS
+    if _SERVICE is None:
+        token_info = json.loads(os.environ["TOKEN_JSON"])
+        _CREDS = Credentials.from_authorized_user_info(token_info, SCOPES)
+        _SERVICE = build("drive", "v3", credentials=_CREDS, cache_discovery=False)
+    if not _CREDS.valid and _CREDS.refresh_token:
+        _CREDS.refresh(Request())
+    return _SERVICE
+
+# ================= FILE ID CACHE =================
+# "<folder_id>/<filename>" -> {"id": Drive fileId, "md5": last synced
+# md5Checksum}, kept on disk so a restart does not need a files().list
+# lookup either. Dropped when Drive answers 404.
+_FILE_IDS = None
+
+def _file_ids():
+    global _FILE_IDS
+    if _FILE_IDS is None:
+        try:
+            with open(DRIVE_ID_CACHE, "r") as f:
+                _FILE_IDS = json.load(f)
+        except (OSError, ValueError):
+            _FILE_IDS = {}
+        # older caches stored the bare file id
+        for key, entry in _FILE_IDS.items():
+            if isinstance(entry, str):
+                _FILE_IDS[key] = {"id": entry, "md5": None}
+    return _FILE_IDS
+
+def _save_file_ids():
+    tmp_path = DRIVE_ID_CACHE + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(_FILE_IDS, f)
+        os.replace(tmp_path, DRIVE_ID_CACHE)
+    except OSError as e:
+        print("⚠️ Could not save Drive file id cache:", e)
+
+def _remember_file(key, file_id, md5):
+    entry = {"id": file_id, "md5": md5}
+    if _file_ids().get(key) != entry:
+        _FILE_IDS[key] = entry
+        _save_file_ids()
+
+def _forget_file_id(key):
+    if _file_ids().pop(key, None) is not None:
+        _save_file_ids()
+
+def file_md5(path):
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _put_file(service, media, folder_id, filename):
+    key = f"{folder_id}/{filename}"
+    entry = _file_ids().get(key)
+
+    if entry:
+        try:
+            result = service.files().update(
+                fileId=entry["id"],
+                media_body=media,
+                fields="id,md5Checksum"
+            ).execute()
+            _remember_file(key, result["id"], result.get("md5Checksum"))
+            return
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+            print("♻ Cached Drive file id is gone, looking it up again")
+            _forget_file_id(key)
+
+    # 🔍 Look ONLY inside the target folder
+    query = (
+        f"name='{filename}' "
+        f"and '{folder_id}' in parents "
+        f"and trashed=false"
+    )
+
+    results = service.files().list(
+        q=query,
+        fields="files(id)",
+        spaces="drive"
+    ).execute()
+
+    if results["files"]:
+        # ♻ Update existing file
+        result = service.files().update(
+            fileId=results["files"][0]["id"],
+            media_body=media,
+            fields="id,md5Checksum"
+        ).execute()
+    else:
+        # 🆕 Create file inside folder
+        result = service.files().create(
+            body={
+                "name": filename,
+                "parents": [folder_id]
+            },
+            media_body=media,
+            fields="id,md5Checksum"
+        ).execute()
+
+    _remember_file(key, result["id"], result.get("md5Checksum"))
+
 def upload_to_drive(local_path, filename, retries=3):
     folder_id = os.environ.get("DRIVE_FOLDER_ID")
 
+    # ⏭ Nothing to do if Drive already has these exact bytes
+    entry = _file_ids().get(f"{folder_id}/{filename}")
+    if entry and entry["md5"] and entry["md5"] == file_md5(local_path):
+        print("⏭ Drive copy already up to date")
+        UPLOAD_SKIPPED.inc()
+        return True
+
+    resumable = os.path.getsize(local_path) > RESUMABLE_THRESHOLD
+
     for attempt in range(1, retries + 1):
         try:
             service = get_drive_service()
 
-            # 🔍 Look ONLY inside the target folder
-            query = (
-                f"name='{filename}' "
-                f"and '{folder_id}' in parents "
-                f"and trashed=false"
-            )
-
-            results = service.files().list(
-                q=query,
-                fields="files(id)",
-                spaces="drive"
-            ).execute()
-
             media = MediaFileUpload(
                 local_path,
-                mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                mimetype=DOCX_MIME,
+                chunksize=CHUNK_SIZE,
+                resumable=resumable
             )
 
-            if results["files"]:
-                # ♻ Update existing file
-                service.files().update(
-                    fileId=results["files"][0]["id"],
-                    media_body=media
-                ).execute()
-            else:
-                # 🆕 Create file inside folder
-                service.files().create(
-                    body={
-                        "name": filename,
-                        "parents": [folder_id]
-                    },
-                    media_body=media,
-                    fields="id"
-                ).execute()
+            with UPLOAD_SECONDS.time():
+                _put_file(service, media, folder_id, filename)
 
             print("✅ Drive sync successful")
             return True
 
         except HttpError as e:
             print(f"⚠️ Drive sync failed (attempt {attempt}/{retries})")
+            UPLOAD_RETRIES.inc()
             print(e)
-            time.sleep(2)
+            if attempt < retries:
+                time.sleep(2)
 
     print("❌ Drive sync failed after all retries")
+    UPLOAD_FAILED.inc()
     return False
@@ -0,0 +1,119 @@
+import logging
+import random
+import threading
+import time
+from metrics import registry
+
+# ================= DRIVE SYNC WORKER =================
+# Uploads run on a background thread so handlers never wait on Drive.
+# Pending uploads are keyed by Drive filename: submitting the same file
+# again while it is queued just replaces the entry, so a burst of edits
+# becomes one upload. A file synced less than min_interval ago is held
+# (not dropped) and uploaded once the interval has passed, so the last
+# edit of a burst always reaches Drive.
+
+
+def upload_to_drive(local_path, filename, retries=3):
+    # googleapiclient is imported on the sync thread, on the first upload
+    from drive import upload_to_drive as upload
+    return upload(local_path, filename, retries)
+
+
+class DriveSyncWorker:
+    def __init__(self, upload=upload_to_drive, retries=5, base_delay=2, max_delay=60,
+                 min_interval=60):
+        self.upload = upload
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.min_interval = min_interval
+        self._pending = {}
+        self._last_sync = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="drive-sync", daemon=True)
+            self._thread.start()
+
+    def submit(self, local_path, filename):
+        with self._cond:
+            merged = filename in self._pending
+            self._pending[filename] = local_path
+            self._cond.notify()
+        if merged:
+            SYNC_MERGED.inc()
+            logging.info("Drive sync for %s already queued, merged", filename)
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def stop(self, timeout=30):
+        # let queued uploads finish, then end the thread
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _backoff(self, attempt):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    def _sync(self, local_path, filename):
+        for attempt in range(1, self.retries + 1):
+            try:
+                if self.upload(local_path, filename, retries=1):
+                    logging.info("Drive sync of %s done (attempt %s)", filename, attempt)
+                    return True
+            except Exception:
+                logging.exception("Drive sync of %s raised", filename)
+            if attempt < self.retries:
+                SYNC_RETRIES.inc()
+                delay = self._backoff(attempt)
+                logging.warning(
+                    "Drive sync of %s failed (attempt %s/%s), retrying in %.1fs",
+                    filename, attempt, self.retries, delay,
+                )
+                time.sleep(delay)
+        logging.error("Drive sync of %s failed after all retries", filename)
+        return False
+
+    def _next_due(self):
+        # pending file whose interval ends first, and how long until then
+        now = time.monotonic()
+        due = {
+            name: self._last_sync.get(name, float("-inf")) + self.min_interval - now
+            for name in self._pending
+        }
+        filename = min(due, key=due.get)
+        return filename, due[filename]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._pending:
+                        if self._stopping:
+                            return
+                        self._cond.wait()
+                        continue
+                    filename, wait = self._next_due()
+                    # on shutdown everything left goes out right away
+                    if wait <= 0 or self._stopping:
+                        break
+                    self._cond.wait(wait)
+                local_path = self._pending.pop(filename)
+            self._sync(local_path, filename)
+            self._last_sync[filename] = time.monotonic()
+
+
+SYNC_MERGED = registry.counter("drive_sync_merged_total", "Sync requests merged into a queued one")
+SYNC_RETRIES = registry.counter("drive_sync_retries_total", "Drive sync attempts retried after backoff")
+
+sync_worker = DriveSyncWorker()
+registry.gauge("drive_sync_queue_depth", "Files waiting for Drive sync", sync_worker.queue_depth)
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+# ================= EDIT COALESCER =================
+# Decides *when* a document's pending journal edits are written to Word.
+# Each document is flushed once it has been quiet for `delay` seconds, or
+# at the latest `max_wait` seconds after its first pending edit, so a busy
+# cohort can not keep pushing everyone's flush back. A document can be
+# held while a follow-up edit is expected (night_yes is followed by the
+# hard topic answer or its timeout), which turns the two edits into one
+# open/save and one Drive sync. flush is a coroutine function; due
+# documents are flushed concurrently.
+FLUSH_DELAY = 30       # seconds of quiet on a document
+FLUSH_MAX_WAIT = 180   # longer than the 120s hard topic timeout
+
+
+class EditCoalescer:
+    def __init__(self, flush, delay=FLUSH_DELAY, max_wait=FLUSH_MAX_WAIT):
+        self.flush = flush  # await flush(path): write the pending edits of one document
+        self.delay = delay
+        self.max_wait = max_wait
+        self._dirty = {}  # path -> [first edit, last edit]
+        self._held = set()
+
+    def touch(self, path):
+        now = time.monotonic()
+        entry = self._dirty.get(path)
+        if entry is None:
+            self._dirty[path] = [now, now]
+        else:
+            entry[1] = now
+
+    def hold(self, path):
+        self._held.add(path)
+
+    def release(self, path):
+        self._held.discard(path)
+
+    def pending(self):
+        return len(self._dirty)
+
+    def due(self):
+        now = time.monotonic()
+        return [
+            path for path, (first, last) in self._dirty.items()
+            if now - first >= self.max_wait
+            or (path not in self._held and now - last >= self.delay)
+        ]
+
+    async def flush_path(self, path):
+        # on demand; also fine for a document with nothing pending
+        self._dirty.pop(path, None)
+        self._held.discard(path)
+        await self.flush(path)
+
+    async def flush_due(self):
+        await asyncio.gather(*(self.flush_path(path) for path in self.due()))
+
+    async def flush_all(self):
+        await asyncio.gather(*(self.flush_path(path) for path in list(self._dirty)))
@@ -0,0 +1,75 @@
+import sqlite3
+import threading
+import time
+from config import JOURNAL_DB
+
+# ================= EDIT JOURNAL =================
+# Append-only log of recorded answers (status / hard topic), kept next to
+# the plan store as a dirty-row marker: its pending entries tell the
+# exporter (scheduler.materialize_edits) which dates of a plan changed
+# since its Word copy was last written. The exporter takes the values from
+# the plan store; the journal's copies are only replayed when a plan is
+# imported again from a .docx that missed them. An entry is marked applied
+# once its row is exported.
+
+
+class EditJournal:
+    def __init__(self, path=JOURNAL_DB):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")  # same as the plan store it marks rows of
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS edits ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " doc TEXT NOT NULL,"
+            " date TEXT NOT NULL,"
+            " col TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " ts REAL NOT NULL,"
+            " applied INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_edits_pending ON edits (doc, applied, id)"
+        )
+        self.conn.commit()
+        # answers are recorded on the event loop, documents are written on
+        # worker threads
+        self._lock = threading.Lock()
+
+    def record(self, doc, date, col, value):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO edits (doc, date, col, value, ts) VALUES (?, ?, ?, ?, ?)",
+                (doc, date.isoformat(), col, value, time.time()),
+            )
+
+    def pending(self, doc):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT id, date, col, value FROM edits"
+                " WHERE doc = ? AND applied = 0 ORDER BY id",
+                (doc,),
+            ).fetchall()
+
+    def pending_docs(self):
+        with self._lock:
+            return [doc for (doc,) in self.conn.execute(
+                "SELECT DISTINCT doc FROM edits WHERE applied = 0"
+            )]
+
+    def mark_applied(self, doc, upto_id):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE edits SET applied = 1 WHERE doc = ? AND applied = 0 AND id <= ?",
+                (doc, upto_id),
+            )
+
+
+_JOURNAL = None
+
+
+def get_journal():
+    global _JOURNAL
+    if _JOURNAL is None:
+        _JOURNAL = EditJournal()
+    return _JOURNAL
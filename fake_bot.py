@@ -0,0 +1,105 @@
+import itertools
+
+# ================= FAKE BOT =================
+# Stand-in for telegram.Bot when running the scheduler / report jobs
+# locally: nothing goes over the network, every call is recorded in
+# bot.sent. Uploads get made-up file ids so the report cache's file_id
+# reuse path is exercised as well.
+#
+#   ctx = FakeContext()
+#   await scheduler.evening_buttons(ctx)
+#   ctx.bot.sent  ->  [Sent("send_message", chat_id, {...}), ...]
+
+
+class Sent:
+    __slots__ = ("method", "chat_id", "kwargs")
+
+    def __init__(self, method, chat_id, kwargs):
+        self.method = method
+        self.chat_id = chat_id
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return f"Sent({self.method}, {self.chat_id})"
+
+
+class _File:
+    __slots__ = ("file_id",)
+
+    def __init__(self, file_id):
+        self.file_id = file_id
+
+
+class FakeMessage:
+    def __init__(self, chat_id, text=None, document=None, photo=None):
+        self.chat_id = chat_id
+        self.text = text
+        self.document = _File(document) if document else None
+        self.photo = [_File(photo)] if photo else None
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+        self._ids = itertools.count(1)
+
+    def _file_id(self, data):
+        # an id string is a re-send, anything else is a fresh upload
+        return data if isinstance(data, str) else f"fake-file-{next(self._ids)}"
+
+    def messages_to(self, chat_id):
+        return [s for s in self.sent if s.chat_id == chat_id]
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(Sent("send_message", chat_id, dict(kwargs, text=text)))
+        return FakeMessage(chat_id, text=text)
+
+    async def send_document(self, chat_id, document, **kwargs):
+        self.sent.append(Sent("send_document", chat_id, dict(kwargs, document=document)))
+        return FakeMessage(chat_id, document=self._file_id(document))
+
+    async def send_photo(self, chat_id, photo, **kwargs):
+        self.sent.append(Sent("send_photo", chat_id, dict(kwargs, photo=photo)))
+        return FakeMessage(chat_id, photo=self._file_id(photo))
+
+
+class FakeJob:
+    def __init__(self, callback, when, name, chat_id):
+        self.callback = callback
+        self.when = when
+        self.name = name
+        self.chat_id = chat_id
+        self.removed = False
+
+    def schedule_removal(self):
+        self.removed = True
+
+
+class FakeJobQueue:
+    # keeps run_once jobs so a test can fire them by hand
+    def __init__(self):
+        self.jobs = []
+
+    def run_once(self, callback, when, name=None, chat_id=None, **kwargs):
+        job = FakeJob(callback, when, name, chat_id)
+        self.jobs.append(job)
+        return job
+
+    def get_jobs_by_name(self, name):
+        return [j for j in self.jobs if j.name == name and not j.removed]
+
+
+class FakeContext:
+    def __init__(self, bot=None):
+        self.bot = bot or FakeBot()
+        self.bot_data = {}
+        self.job_queue = FakeJobQueue()
+        self.job = None
+
+    async def run_job(self, job):
+        job.removed = True
+        self.job = job
+        try:
+            await job.callback(self)
+        finally:
+            self.job = None
@@ -0,0 +1,121 @@
+import functools
+import heapq
+import re
+from operator import itemgetter
+
+# ================= HARD TOPICS =================
+# Hard topics are typed freely, so "Pointers", "pointers " and "pointer"
+# are counted as one topic: normalize() lower-cases, drops punctuation and
+# extra whitespace and strips plural endings. The counts per topic (all
+# time, per ISO week, per month) are part of each plan's running
+# aggregates; this module ranks them and searches the topic names.
+SEARCH_LIMIT = 10
+_WORD = re.compile(r"[a-z0-9+#]+")
+
+
+def _stem(word):
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("sses", "shes", "ches", "xes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize(text):
+    key = " ".join(_stem(word) for word in _WORD.findall(text.lower()))
+    return key or " ".join(text.lower().split())
+
+
+def week_key(d):
+    year, week, _ = d.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def top_k(counts, labels, k=5):
+    # ties keep first-seen order, like Counter.most_common
+    return [(labels[key], n) for key, n in heapq.nlargest(k, counts.items(), key=itemgetter(1))]
+
+
+# ================= SEARCH INDEX =================
+class TopicIndex:
+    # prefix search through a trie over every word of every topic, substring
+    # search through a trigram -> topics map; both only grow, counts decide
+    # what is still shown
+    __slots__ = ("keys", "trie", "grams")
+
+    def __init__(self):
+        self.keys = set()
+        self.trie = {}
+        self.grams = {}
+
+    def add(self, key):
+        if key in self.keys:
+            return
+        self.keys.add(key)
+        for word in key.split():
+            node = self.trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+                node.setdefault("", set()).add(key)
+        for i in range(len(key) - 2):
+            self.grams.setdefault(key[i:i + 3], set()).add(key)
+
+    def prefix(self, text):
+        # topics with a word starting with text; the trie narrows it down by
+        # the first word, the rest of a multi-word query is checked after
+        first = text.split(" ", 1)[0]
+        node = self.trie
+        for ch in first:
+            node = node.get(ch)
+            if node is None:
+                return set()
+        keys = node.get("", set())
+        if first == text:
+            return keys
+        return {key for key in keys if (" " + text) in (" " + key)}
+
+    def substring(self, text):
+        if len(text) < 3:
+            return {key for key in self.keys if text in key}
+        found = None
+        for i in range(len(text) - 2):
+            keys = self.grams.get(text[i:i + 3], set())
+            found = keys if found is None else found & keys
+            if not found:
+                return set()
+        return {key for key in found if text in key}
+
+    def search(self, query, counts, labels, limit=SEARCH_LIMIT):
+        # topics with a word starting with the query first, then any other
+        # topic containing it; most counted first within each group
+        text = normalize(query)
+        if not text:
+            return []
+        # the query's last word may be cut short, match it unstemmed too
+        raw = " ".join(query.lower().split())
+        starts = self.prefix(text) | self.prefix(raw)
+        contains = (self.substring(text) | self.substring(raw)) - starts
+        found = []
+        for group in (starts, contains):
+            live = [key for key in group if counts.get(key)]
+            live.sort(key=lambda key: (-counts[key], labels[key]))
+            found.extend((labels[key], counts[key]) for key in live)
+        return found[:limit]
+
+
+_INDEXES = {}
+
+
+def topic_index(path, counts):
+    # one index per plan, built from the aggregate counts; topics seen
+    # since the last search are added, nothing is rescanned
+    index = _INDEXES.get(path)
+    if index is None:
+        index = _INDEXES[path] = TopicIndex()
+    if not index.keys.issuperset(counts):
+        for key in counts:
+            index.add(key)
+    return index
@@ -0,0 +1,238 @@
+import functools
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ================= METRICS =================
+# Counters, latency histograms and queue-depth gauges for the hot paths,
+# kept in process. They are served in the Prometheus text format on
+# METRICS_PORT (off unless set, bound to localhost) and summarised by the
+# /stats command. Updates may come from the Drive sync thread as well as
+# the event loop, so every metric has its own lock.
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge:
+    # read from a callback when scraped, e.g. a queue's current depth;
+    # kind="counter" for running totals kept elsewhere
+    def __init__(self, name, help, read, kind="gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.kind = kind
+
+    def samples(self):
+        try:
+            return [(self.name, (), self.read())]
+        except Exception:
+            logging.exception("Reading gauge %s failed", self.name)
+            return []
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def series(self):
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    def samples(self):
+        out = []
+        for key, series in self.series().items():
+            for bound, count in zip(self.buckets, series):
+                out.append((self.name + "_bucket", key + (("le", bound),), count))
+            out.append((self.name + "_bucket", key + (("le", "+Inf"),), series[-2]))
+            out.append((self.name + "_sum", key, series[-1]))
+            out.append((self.name + "_count", key, series[-2]))
+        return out
+
+    def quantile(self, key, q):
+        # upper bound of the bucket holding the q-th observation
+        series = self.series().get(key)
+        if not series or not series[-2]:
+            return None
+        rank = q * series[-2]
+        for bound, count in zip(self.buckets, series):
+            if count >= rank:
+                return bound
+        return float("inf")
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        # modules may be imported twice (spawned workers), keep the first
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help):
+        return self._add(Counter(name, help))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, buckets))
+
+    def gauge(self, name, help, read, kind="gauge"):
+        return self._add(Gauge(name, help, read, kind))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        # short human readable view for /stats
+        lines = []
+        for metric in self._metrics.values():
+            if isinstance(metric, Histogram):
+                for key, series in sorted(metric.series().items()):
+                    count = series[-2]
+                    if not count:
+                        continue
+                    p95 = metric.quantile(key, 0.95)
+                    lines.append(
+                        f"{metric.name}{_format_labels(key)}: n={count} "
+                        f"avg={series[-1] / count * 1000:.1f}ms p95<={p95 * 1000:.0f}ms"
+                    )
+            else:
+                for name, key, value in metric.samples():
+                    lines.append(f"{name}{_format_labels(key)}: {value}")
+        return "\n".join(lines) or "No metrics yet"
+
+
+registry = MetricsRegistry()
+
+HANDLER_SECONDS = registry.histogram(
+    "bot_handler_seconds", "Time spent in Telegram update handlers and jobs"
+)
+HANDLER_ERRORS = registry.counter(
+    "bot_handler_errors_total", "Handlers and jobs that raised"
+)
+
+
+def timed_handler(name):
+    # wraps an async handler / job callback with latency and error metrics
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapped(*args, **kwargs):
+            with HANDLER_SECONDS.time(handler=name):
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception:
+                    HANDLER_ERRORS.inc(handler=name)
+                    raise
+        return wrapped
+    return decorate
+
+
+# ================= HTTP ENDPOINT =================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the log
+
+
+_SERVER = None
+
+
+def start_http(host=METRICS_HOST, port=METRICS_PORT):
+    global _SERVER
+    if not port or _SERVER is not None:
+        return None
+    _SERVER = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=_SERVER.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info("Metrics on http://%s:%s/metrics", host, port)
+    return _SERVER
+
+
+def stop_http():
+    global _SERVER
+    if _SERVER is not None:
+        _SERVER.shutdown()
+        _SERVER.server_close()
+        _SERVER = None
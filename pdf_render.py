@@ -0,0 +1,77 @@
+import io
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.lib.units import cm
+
+# ================= PDF RENDER =================
+# The reportlab side of the PDF reports: text lines in, PDF bytes out.
+# Runs in the render workers; reports.py imports it only when a PDF is
+# drawn in-process, so the bot itself starts without reportlab.
+PDF_COLUMNS = (
+    ("Date", 2 * cm),
+    ("Status", 5 * cm),
+    ("Hard Topic", 7 * cm),
+    ("C Topic", 11 * cm),
+    ("Java Topic", 15 * cm),
+)
+STATUS_COLORS = {"DONE": colors.green, "MISS": colors.red}
+
+def _draw_table_header(c, y):
+    c.saveState()
+    c.translate(0, y)
+    c.doForm("table_header")
+    c.restoreState()
+
+def render_pdf(lines, title):
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    width, height = A4
+
+    # Table header: drawn once as a form, stamped on every page
+    c.beginForm("table_header")
+    c.setFont("Helvetica-Bold", 10)
+    c.setFillColor(colors.black)
+    for label, x in PDF_COLUMNS:
+        c.drawString(x, 0, label)
+    c.endForm()
+
+    # Title
+    y = height - 2 * cm
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(2 * cm, y, title)
+    y -= 1.5 * cm
+
+    _draw_table_header(c, y)
+    y -= 1 * cm
+    c.setFont("Helvetica", 10)
+
+    x_date, x_status, x_hard, x_c, x_java = (x for _, x in PDF_COLUMNS)
+
+    for date, status, hard, c_topic, java_topic in lines:
+        # Date
+        c.setFillColor(colors.black)
+        c.drawString(x_date, y, date)
+
+        # Status (ONLY this colored)
+        c.setFillColor(STATUS_COLORS.get(status, colors.black))
+        c.drawString(x_status, y, status)
+
+        # Rest (black)
+        c.setFillColor(colors.black)
+        c.drawString(x_hard, y, hard)
+        c.drawString(x_c, y, c_topic)
+        c.drawString(x_java, y, java_topic)
+
+        y -= 0.8 * cm
+
+        # Page break
+        if y < 2 * cm:
+            c.showPage()
+            y = height - 2 * cm
+            _draw_table_header(c, y)
+            y -= 1 * cm
+            c.setFont("Helvetica", 10)
+
+    c.save()
+    return buf.getvalue()
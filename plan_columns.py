@@ -0,0 +1,112 @@
+from collections import Counter
+import numpy as np
+from plan_model import DONE, EMPTY
+from hard_topics import normalize
+
+# ================= COLUMNAR BACKEND =================
+# NumPy view of the plan rows: dates as datetime64[D], statuses as int8.
+# Range filters, streaks and window consistency become array operations,
+# which keeps multi-year / multi-cohort plans cheap.
+
+
+class PlanColumns:
+    __slots__ = (
+        "rows", "dates", "status", "done", "marked",
+        "topics", "topic_id", "hard", "penalized",
+    )
+
+    def __init__(self, rows):
+        n = len(rows)
+        self.rows = rows
+        self.dates = np.array([r.date for r in rows], dtype="datetime64[D]")
+        self.status = np.fromiter((r.status for r in rows), dtype=np.int8, count=n)
+        self.done = self.status == DONE
+        self.marked = self.status != EMPTY
+        # hard topics as int codes (first-seen order), -1 for no topic;
+        # spellings of one topic share a code and its first spelling
+        ids, self.topics = {}, []
+
+        def topic_id(hard):
+            key = normalize(hard)
+            if key not in ids:
+                ids[key] = len(self.topics)
+                self.topics.append(hard)
+            return ids[key]
+
+        self.topic_id = np.fromiter(
+            (topic_id(r.hard) if r.hard and r.hard.lower() != "none" else -1 for r in rows),
+            dtype=np.int32,
+            count=n,
+        )
+        self.hard = self.topic_id >= 0
+        # study score takes 2 points off any done day not marked "none"
+        self.penalized = np.fromiter(
+            (r.hard.lower() != "none" for r in rows), dtype=bool, count=n
+        )
+
+    def range_mask(self, start=None, end=None):
+        mask = np.ones(len(self.rows), dtype=bool)
+        if start:
+            mask &= self.dates >= np.datetime64(start, "D")
+        if end:
+            mask &= self.dates <= np.datetime64(end, "D")
+        return mask
+
+    def best_streak(self, mask=None):
+        done = self.done if mask is None else self.done[mask]
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], done.view(np.int8), [0]))))
+        if not edges.size:
+            return 0
+        return int((edges[1::2] - edges[::2]).max())
+
+    def counts(self, mask):
+        return int(np.count_nonzero(self.done & mask)), int(np.count_nonzero(self.marked & mask))
+
+    def points(self, mask):
+        idx = np.flatnonzero(mask)
+        return [(self.rows[i].date, int(self.done[i])) for i in idx]
+
+    def hard_topics(self, mask):
+        return [self.rows[i] for i in np.flatnonzero(self.hard & mask)]
+
+    def hard_counts(self, mask):
+        ids = self.topic_id[self.hard & mask]
+        uniq, first, counts = np.unique(ids, return_index=True, return_counts=True)
+        # keep first-seen order so most_common() breaks ties like Counter would
+        return Counter({self.topics[uniq[i]]: int(counts[i]) for i in np.argsort(first)})
+
+
+_LAST = [None, None]
+
+
+def plan_columns(rows):
+    # plan views are rebuilt on every change, so identity is a safe cache key
+    if _LAST[0] is not rows:
+        _LAST[0], _LAST[1] = rows, PlanColumns(rows)
+    return _LAST[1]
+
+
+def fill_metrics(m, rows):
+    cols = plan_columns(rows)
+    sub = cols.range_mask(m.start, m.end)
+
+    week = cols.range_mask(m.week_start, m.today)
+    m.week_done, week_marked = cols.counts(week)
+    m.week_miss = week_marked - m.week_done
+    m.week_hard = [(r.date, r.hard) for r in cols.hard_topics(week)]
+    m.week_points = cols.points(week)
+
+    m.r30_done, r30_marked = cols.counts(cols.range_mask(m.r30_start, m.today))
+    m.r30_miss = r30_marked - m.r30_done
+
+    lm = cols.range_mask(m.lm_start, m.lm_end)
+    m.month_points = cols.points(lm)
+    m.lm_done = cols.counts(lm)[0]
+    m.pm_done = cols.counts(cols.range_mask(m.pm_start, m.pm_end))[0]
+
+    m.done, m.total = cols.counts(sub)
+    m.max_score = 10 * m.total
+    m.score = 10 * m.done - 2 * int(np.count_nonzero(cols.done & cols.penalized & sub))
+    m.best_streak = cols.best_streak(sub)
+    m.hard_counts = cols.hard_counts(sub)
+    return m
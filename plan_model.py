@@ -0,0 +1,264 @@
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from config import WORD_FILE
+from edit_journal import get_journal
+from docx_stream import iter_table_rows
+from plan_store import get_plan_store
+
+# ================= PLAN MODEL =================
+# One compact in-memory copy of the study plan, shared by every report.
+# Plans live in the SQLite plan store; a .docx is read only once, when its
+# plan is first imported. The copy is rebuilt when the store's version of
+# the plan changes, i.e. after an answer was recorded.
+REQUIRED = {"date", "status", "hard topic", "c topic", "java topic"}
+EMPTY, DONE, MISS = 0, 1, 2
+STATUS_TEXT = {EMPTY: "", DONE: "✅", MISS: "❌"}  # what the Word export writes
+
+
+class PlanRow:
+    __slots__ = ("date", "status", "hard", "c_topic", "java_topic", "table", "row")
+
+    def __init__(self, date, status, hard, c_topic, java_topic, table, row):
+        self.date = date
+        self.status = status
+        self.hard = hard
+        self.c_topic = c_topic
+        self.java_topic = java_topic
+        # where the row lives in the document: doc.tables[table].rows[row]
+        self.table = table
+        self.row = row
+
+
+class PlanIndex:
+    # date -> position in Plan.rows, plus each table's header map and the
+    # dated positions sorted by date for range scans
+    __slots__ = ("by_date", "columns", "dates", "order")
+
+    def __init__(self, by_date, columns, dated):
+        self.by_date = by_date
+        self.columns = columns
+        dated.sort()
+        self.dates = [d for d, _ in dated]
+        self.order = [pos for _, pos in dated]
+
+
+class Plan:
+    __slots__ = ("path", "rows", "signature", "version", "index")
+
+    def __init__(self, path, rows, signature, index, version=0):
+        self.path = path
+        self.rows = rows
+        self.signature = signature
+        self.index = index
+        self.version = version
+
+    def iter_range(self, start, end):
+        index = self.index
+        lo = bisect_left(index.dates, start)
+        hi = bisect_right(index.dates, end)
+        for pos in index.order[lo:hi]:
+            yield self.rows[pos]
+
+
+def status_code(text):
+    if "✅" in text:
+        return DONE
+    if "❌" in text:
+        return MISS
+    return EMPTY
+
+
+def parse_date(text):
+    if not text:
+        return None
+    # Clean Word formatting junk
+    text = text.strip().replace("\n", "").replace("\xa0", "")
+    try:
+        return datetime.strptime(text[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def header_map(texts):
+    # column name -> cell index when this row is a plan header row
+    cells = [t.strip().lower() for t in texts]
+    if REQUIRED.issubset(set(cells)):
+        return {text: idx for idx, text in enumerate(cells) if text}
+    return None
+
+
+def find_headers(table):
+    # python-docx table (used when writing plan copies)
+    for i, row in enumerate(table.rows):
+        headers = header_map([c.text for c in row.cells])
+        if headers:
+            return headers, i
+    return None, None
+
+
+def parse_day(text):
+    text = text.strip()
+    return int(text) if text.isdigit() else None
+
+
+def read_plan(path):
+    # streamed table by table from the XML, no python-docx object tree.
+    # Returns the store's row tuples in document order and the header map
+    # of each plan table.
+    rows, columns = [], {}
+
+    for t, r, cells in iter_table_rows(path):
+        headers = columns.get(t)
+        if headers is None:
+            # rows before a table's header row are not plan rows
+            headers = header_map(cells)
+            if headers:
+                columns[t] = headers
+            continue
+        date_text = cells[headers["date"]]
+        # skip empty rows
+        if not date_text.strip():
+            continue
+        rows.append((
+            parse_date(date_text),
+            parse_day(cells[headers["day"]]) if "day" in headers else None,
+            status_code(cells[headers["status"]]),
+            cells[headers["hard topic"]].strip(),
+            cells[headers["c topic"]].strip(),
+            cells[headers["java topic"]].strip(),
+            t,
+            r,
+        ))
+
+    if not rows:
+        raise ValueError("No tables with required columns found.")
+    return rows, columns
+
+
+def _plan_row(d, status, hard, c_topic, java_topic, table, row):
+    if isinstance(d, str):
+        d = date.fromisoformat(d)
+    return PlanRow(d, status, hard, c_topic, java_topic, table, row)
+
+
+def _build(rows, columns):
+    plan_rows = []
+    by_date, dated = {}, []
+    for pos, (d, _day, *rest) in enumerate(rows):
+        row = _plan_row(d, *rest)
+        if row.date:
+            by_date[row.date] = pos
+            dated.append((row.date, pos))
+        plan_rows.append(row)
+    return plan_rows, PlanIndex(by_date, columns, dated)
+
+
+def _apply_edits(rows, edits):
+    rows = list(rows)
+    positions = {r[0]: i for i, r in enumerate(rows) if r[0]}
+
+    for _, when, col, value in edits:
+        i = positions.get(datetime.strptime(when, "%Y-%m-%d").date())
+        if i is None:
+            continue
+        d, day, status, hard, *rest = rows[i]
+        if col == "status":
+            status = status_code(value)
+        elif col == "hard topic":
+            hard = value.strip()
+        rows[i] = (d, day, status, hard, *rest)
+
+    return rows
+
+
+# ================= STORE =================
+# Imports of one plan are serialized: the startup import thread and a
+# handler on the event loop can both find a plan missing, and the second
+# import would replace answers recorded after the first one.
+_IMPORT_LOCKS = {}
+_IMPORT_LOCKS_GUARD = threading.Lock()
+
+
+def _import_lock(path):
+    with _IMPORT_LOCKS_GUARD:
+        return _IMPORT_LOCKS.setdefault(path, threading.Lock())
+
+
+def _import(path):
+    rows, columns = read_plan(path)
+    edits = get_journal().pending(path)
+    if edits:
+        rows = _apply_edits(rows, edits)
+    get_plan_store().replace(path, rows, columns)
+
+
+def import_plan(path):
+    # the .docx as it is on disk plus anything the journal has not
+    # written into it yet; replaces whatever the store had for it
+    with _import_lock(path):
+        _import(path)
+
+
+def ensure_imported(path):
+    # True when the plan was missing from the store and got imported here
+    store = get_plan_store()
+    if store.has(path):
+        return False
+    with _import_lock(path):
+        if store.has(path):
+            return False  # imported by whoever held the lock
+        _import(path)
+    return True
+
+
+def _store(path):
+    ensure_imported(path)
+    return get_plan_store()
+
+
+def record_value(path, d, column, value):
+    # (row before, row after) of the change; None when the plan has no
+    # row for that date
+    old = load_plan(path)
+    pos = old.index.by_date.get(d)
+    if pos is None:
+        return None
+    r = old.rows[pos]
+    if column == "status":
+        field, value = "status", status_code(value)
+        new = PlanRow(r.date, value, r.hard, r.c_topic, r.java_topic, r.table, r.row)
+    elif column == "hard topic":
+        field, value = "hard", value.strip()
+        new = PlanRow(r.date, r.status, value, r.c_topic, r.java_topic, r.table, r.row)
+    else:
+        raise ValueError(f"Unknown plan column {column}")
+    store = _store(path)
+    if not store.set_value(path, d, field, value):
+        return None
+    if store.version(path) == old.version + 1:
+        # patch the cached copy instead of reading the plan back
+        rows = list(old.rows)
+        rows[pos] = new
+        _PLANS[path] = Plan(path, rows, old.signature, old.index, old.version + 1)
+    return r, new
+
+
+def query_range(path, start, end):
+    # indexed range scan in the store, without building the whole plan
+    for d, day, *rest in _store(path).range(path, start, end):
+        yield _plan_row(d, *rest)
+
+
+_PLANS = {}
+
+
+def load_plan(path=WORD_FILE):
+    store = _store(path)
+    version = store.version(path)
+    plan = _PLANS.get(path)
+    if plan is None or plan.version != version:
+        rows, index = _build(store.rows(path), store.columns(path))
+        plan = Plan(path, rows, store.signature(path), index, version)
+        _PLANS[path] = plan
+    return plan
@@ -0,0 +1,125 @@
+import json
+import sqlite3
+import threading
+import time
+from config import PLAN_DB
+
+# ================= PLAN STORE =================
+# The system of record for every plan: one SQLite row per plan row with
+# its status, hard topic and topics. The Word file is only an import /
+# export format: a plan is imported from its .docx once, every answer is
+# written here first, and the Word copy for Drive is regenerated from
+# these rows (scheduler.materialize_edits).
+#
+# Each row also keeps where it lives in the document (table, row) and each
+# table its header map, so the exporter can find the cells to write.
+# status holds plan_model's codes (0 empty, 1 done, 2 missed).
+ROW_COLUMNS = "date, day, status, hard, c_topic, java_topic, tbl, row"
+
+
+class PlanStore:
+    def __init__(self, path=PLAN_DB):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")  # answers are acknowledged after the commit
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS plans ("
+            " doc TEXT PRIMARY KEY,"
+            " columns TEXT NOT NULL,"
+            " imported REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS plan_rows ("
+            " doc TEXT NOT NULL,"
+            " pos INTEGER NOT NULL,"
+            " date TEXT,"
+            " day INTEGER,"
+            " status INTEGER NOT NULL,"
+            " hard TEXT NOT NULL,"
+            " c_topic TEXT NOT NULL,"
+            " java_topic TEXT NOT NULL,"
+            " tbl INTEGER NOT NULL,"
+            " row INTEGER NOT NULL,"
+            " PRIMARY KEY (doc, pos))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_plan_rows_date ON plan_rows (doc, date)")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_plan_rows_status ON plan_rows (doc, status, date)"
+        )
+        self.conn.commit()
+        # the event loop and the startup import thread share the connection
+        self._lock = threading.Lock()
+        self._imported = dict(self.conn.execute("SELECT doc, imported FROM plans"))
+        # bumped on every change so readers can cache what they built
+        self._versions = {}
+
+    def has(self, doc):
+        return doc in self._imported
+
+    def signature(self, doc):
+        return self._imported.get(doc)
+
+    def version(self, doc):
+        return self._versions.get(doc, 0)
+
+    def replace(self, doc, rows, columns):
+        # rows: (date, day, status, hard, c_topic, java_topic, table, row)
+        # tuples in document order; columns: table -> header map
+        imported = time.time()
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM plan_rows WHERE doc = ?", (doc,))
+            self.conn.executemany(
+                f"INSERT INTO plan_rows (doc, pos, {ROW_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(doc, pos, d and d.isoformat(), *rest) for pos, (d, *rest) in enumerate(rows)],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO plans (doc, columns, imported) VALUES (?, ?, ?)",
+                (doc, json.dumps(columns), imported),
+            )
+        self._imported[doc] = imported
+        self._versions[doc] = self.version(doc) + 1
+
+    def rows(self, doc):
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT {ROW_COLUMNS} FROM plan_rows WHERE doc = ? ORDER BY pos", (doc,)
+            ).fetchall()
+
+    def columns(self, doc):
+        with self._lock:
+            found = self.conn.execute("SELECT columns FROM plans WHERE doc = ?", (doc,)).fetchone()
+        if found is None:
+            return {}
+        return {int(table): headers for table, headers in json.loads(found[0]).items()}
+
+    def range(self, doc, start, end):
+        # dated rows from start to end inclusive, by date
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT {ROW_COLUMNS} FROM plan_rows"
+                " WHERE doc = ? AND date BETWEEN ? AND ? ORDER BY date, pos",
+                (doc, start.isoformat(), end.isoformat()),
+            ).fetchall()
+
+    def set_value(self, doc, date, field, value):
+        # field: "status" (a status code) or "hard"; False when no row has that date
+        if field not in ("status", "hard"):
+            raise ValueError(f"Unknown plan field {field}")
+        with self._lock, self.conn:
+            changed = self.conn.execute(
+                f"UPDATE plan_rows SET {field} = ? WHERE doc = ? AND date = ?",
+                (value, doc, date.isoformat()),
+            ).rowcount
+        if changed:
+            self._versions[doc] = self.version(doc) + 1
+        return bool(changed)
+
+
+_STORE = None
+
+
+def get_plan_store():
+    global _STORE
+    if _STORE is None:
+        _STORE = PlanStore()
+    return _STORE
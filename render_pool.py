@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# ================= RENDER POOL =================
+# reportlab / matplotlib work is CPU bound; it runs in a small pool of
+# worker processes so the bot keeps answering while reports render.
+# Workers get plain data in and hand bytes back.
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+
+_POOL = None
+
+
+def _preload():
+    import charts  # noqa: F401  (pulls in matplotlib's Agg canvas)
+    import pdf_render  # noqa: F401  (reportlab)
+    import reports  # noqa: F401  (render functions are looked up here)
+
+
+def _ready():
+    return os.getpid()
+
+
+def get_pool():
+    global _POOL
+    if _POOL is None:
+        # spawn: the parent runs threads (Drive sync, sqlite), forking it is unsafe
+        _POOL = ProcessPoolExecutor(
+            max_workers=RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_preload,
+        )
+    return _POOL
+
+
+def warm_up():
+    # start every worker now instead of on the first report
+    pool = get_pool()
+    for _ in range(RENDER_WORKERS):
+        pool.submit(_ready)
+
+
+async def render(fn, *args):
+    global _POOL
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_pool(), fn, *args)
+    except BrokenProcessPool:
+        logging.exception("Render pool broke, starting a new one")
+        _POOL = None
+        return await loop.run_in_executor(get_pool(), fn, *args)
+
+
+def shutdown():
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(cancel_futures=True)
+        _POOL = None
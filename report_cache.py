@@ -0,0 +1,67 @@
+import sys
+import time
+from collections import OrderedDict
+
+# ================= REPORT CACHE =================
+# Generated artifacts (PDF / PNG bytes, computed metrics) keyed on what
+# they show: the date range plus the plan version for PDFs and metrics,
+# the plotted data itself for charts. Entries also remember the file_id
+# Telegram gave the upload, so a cached artifact is re-sent by id instead
+# of being uploaded again.
+CACHE_MAX_ITEMS = 64
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+CACHE_TTL = 6 * 60 * 60  # seconds
+
+
+class CacheEntry:
+    __slots__ = ("value", "size", "expires", "file_id")
+
+    def __init__(self, value, size, expires, file_id=None):
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.file_id = file_id
+
+
+class ReportCache:
+    def __init__(self, max_items=CACHE_MAX_ITEMS, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry.expires < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, value, file_id=None):
+        if key in self._entries:
+            self._drop(key)
+        size = len(value) if isinstance(value, (bytes, str)) else sys.getsizeof(value)
+        entry = CacheEntry(value, size, time.monotonic() + self.ttl, file_id)
+        self._entries[key] = entry
+        self.bytes += size
+        while self._entries and (
+            len(self._entries) > self.max_items or self.bytes > self.max_bytes
+        ):
+            self._drop(next(iter(self._entries)))
+        return entry
+
+    def _drop(self, key):
+        self.bytes -= self._entries.pop(key).size
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+
+report_cache = ReportCache()
@@ -1,23 +1,19 @@
+import asyncio
+import logging
 from datetime import datetime, timedelta, time as dt_time
-from docx import Document
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
 from telegram import Update
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes, CommandHandler
-from config import WORD_FILE, CHAT_ID, IST
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-from collections import Counter
-import os
-async def cleanup(send_coro, file_path):
-    try:
-        await send_coro
-    finally:
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
+from config import IST, WORD_FILE
+from plan_model import load_plan, query_range, DONE, MISS
+from analytics import metrics_from_aggregates
+from aggregates import plan_aggregates, hard_bucket
+from hard_topics import top_k, topic_index
+from render_pool import render
+from report_cache import report_cache
+from users import get_registry
+from broadcast import broadcaster
+from metrics import registry, timed_handler
 def job_wrapper(async_func):
     async def wrapped(context):
         try:
@@ -27,425 +23,274 @@ def job_wrapper(async_func):
             raise
     return wrapped
 # ================= INTERNAL HELPERS
-def _get_table():
-    doc = Document(WORD_FILE)
-    REQUIRED = {"date", "status", "hard topic", "c topic", "java topic"}
-
-    for table in doc.tables:
-        for row in table.rows:
-            cells = [c.text.strip().lower() for c in row.cells]
-            if REQUIRED.issubset(set(cells)):
-                headers = {
-                    c.text.strip().lower(): i
-                    for i, c in enumerate(row.cells)
-                }
-                return table, headers
-
-    raise ValueError("Required table not found")
-def _get_all_rows():
-        doc = Document(WORD_FILE)
-        all_rows = []
-
-        REQUIRED = {"date", "status", "hard topic", "c topic", "java topic"}
-
-        for table in doc.tables:
-            headers = None
-            header_idx = None
-
-            for i, row in enumerate(table.rows):
-                cells = [c.text.strip().lower() for c in row.cells if c.text.strip()]
-                if REQUIRED.issubset(set(cells)):
-                    headers = {
-                        c.text.strip().lower(): idx
-                        for idx, c in enumerate(row.cells)
-                        if c.text.strip()
-                    }
-                    header_idx = i
-                    break
-
-            if not headers:
-                continue
-
-            for row in table.rows[header_idx + 1:]:
-                # skip empty rows
-                if not row.cells[headers["date"]].text.strip():
-                    continue
-                all_rows.append((row, headers))
-
-        if not all_rows:
-            raise ValueError("No tables with required columns found.")
-
-        return all_rows
-
-def _parse_date(row, headers):
-    text = row.cells[headers["date"]].text
-
-    if not text:
-        return None
+REPORT_SECONDS = registry.histogram("report_prepare_seconds", "Preparing one report item, render included")
+RENDER_SECONDS = registry.histogram("report_render_seconds", "PDF / chart renders (cache misses)")
+registry.gauge("report_cache_hits_total", "Report cache hits", lambda: report_cache.hits, kind="counter")
+registry.gauge("report_cache_misses_total", "Report cache misses", lambda: report_cache.misses, kind="counter")
+registry.gauge("report_cache_bytes", "Bytes held by the report cache", lambda: report_cache.bytes)
+
+def _get_metrics(plan, metrics=None):
+    if metrics is not None:
+        return metrics
+    today = datetime.now(IST).date()
+    key = ("metrics", plan.path, today, plan.signature, plan.version)
+    entry = report_cache.get(key)
+    if entry is None:
+        entry = report_cache.put(key, metrics_from_aggregates(plan, plan_aggregates(plan), today))
+    return entry.value
 
-    # Clean Word formatting junk
-    text = text.strip().replace("\n", "").replace("\xa0", "")
+def _file_id(message, kind):
+    if kind == "photo":
+        photos = getattr(message, "photo", None)
+        return photos[-1].file_id if photos else None
+    document = getattr(message, "document", None)
+    return document.file_id if document else None
 
-    try:
-        return datetime.strptime(
-            text[:10], "%Y-%m-%d"
-        ).date()
-    except:
-        return None
+def _status_label(row):
+    return "DONE" if row.status == DONE else "MISS" if row.status == MISS else "-"
 
 
 # ================= PDF CORE =================
-def generate_pdf(start_date, end_date, title):
-    all_rows = _get_all_rows()
-    pdf_path = os.path.join("/tmp", f"{title.replace(' ', '_')}.pdf")
-    c = canvas.Canvas(pdf_path, pagesize=A4)
-    width, height = A4
-
-    # Title
-    y = height - 2 * cm
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(2 * cm, y, title)
-    y -= 1.5 * cm
-
-    # Table header
-    c.setFont("Helvetica-Bold", 10)
-    c.setFillColor(colors.black)
-    c.drawString(2 * cm, y, "Date")
-    c.drawString(5 * cm, y, "Status")
-    c.drawString(7 * cm, y, "Hard Topic")
-    c.drawString(11 * cm, y, "C Topic")
-    c.drawString(15 * cm, y, "Java Topic")
-    y -= 1 * cm
-
-    c.setFont("Helvetica", 10)
-
-    for row, headers in all_rows:
-        d = _parse_date(row, headers)
-        if not d or not (start_date <= d <= end_date):
-            continue
-
-        raw_status = row.cells[headers["status"]].text.strip()
-        status = "DONE" if "✅" in raw_status else "MISS" if "❌" in raw_status else "-"
-
-        hard = row.cells[headers["hard topic"]].text.strip() or "None"
-        c_topic = row.cells[headers["c topic"]].text.strip() or "-"
-        java_topic = row.cells[headers["java topic"]].text.strip() or "-"
-
-        # Column X positions
-        x_date = 2 * cm
-        x_status = 5 * cm
-        x_hard = 7 * cm
-        x_c = 11 * cm
-        x_java = 15 * cm
-
-        # Date
-        c.setFillColor(colors.black)
-        c.drawString(x_date, y, str(d))
-
-        # Status (ONLY this colored)
-        if status == "DONE":
-            c.setFillColor(colors.green)
-        elif status == "MISS":
-            c.setFillColor(colors.red)
-        else:
-            c.setFillColor(colors.black)
-        c.drawString(x_status, y, status)
-
-        # Rest (black)
-        c.setFillColor(colors.black)
-        c.drawString(x_hard, y, hard[:25])
-        c.drawString(x_c, y, c_topic[:25])
-        c.drawString(x_java, y, java_topic[:25])
-
-        y -= 0.8 * cm
-
-        # Page break
-        if y < 2 * cm:
-            c.showPage()
-            y = height - 2 * cm
-            c.setFont("Helvetica-Bold", 10)
-            c.drawString(2 * cm, y, "Date")
-            c.drawString(5 * cm, y, "Status")
-            c.drawString(7 * cm, y, "Hard Topic")
-            c.drawString(11 * cm, y, "C Topic")
-            c.drawString(15 * cm, y, "Java Topic")
-            y -= 1 * cm
-            c.setFont("Helvetica", 10)
-
-    c.save()
-    return pdf_path
-
-# ================= WEEKLY PDF =================
-async def send_weekly_report(context):
-    today = datetime.now(IST).date()
-    start = today - timedelta(days=6)
-    pdf = generate_pdf(start, today, "Weekly Study Report")
-    with open(pdf,"rb") as f:
-        await cleanup(context.bot.send_document(chat_id=CHAT_ID, document=f),pdf)
-# ================= MONTHLY PDF =================
-async def send_monthly_report(context):
-    today = datetime.now(IST).date()
-    first = today.replace(day=1)
-    last_end = first - timedelta(days=1)
-    last_start = last_end.replace(day=1)
-
-    pdf = generate_pdf(
-        last_start,
-        last_end,
-        f"Monthly Report {last_start.strftime('%B %Y')}",
+def _pdf_filename(title):
+    return f"{title.replace(' ', '_')}.pdf"
+
+def _pdf_lines(rows):
+    for row in rows:
+        yield (
+            str(row.date),
+            _status_label(row),
+            (row.hard or "None")[:25],
+            (row.c_topic or "-")[:25],
+            (row.java_topic or "-")[:25],
+        )
+
+def render_pdf(lines, title):
+    # reportlab is only loaded where PDFs are actually drawn
+    from pdf_render import render_pdf as draw
+    return draw(lines, title)
+
+def generate_pdf(start_date, end_date, title, path=WORD_FILE):
+    # rows stream from an indexed range query straight into the canvas
+    return render_pdf(_pdf_lines(query_range(path, start_date, end_date)), title)
+
+async def generate_pdf_async(start_date, end_date, title, plan=None):
+    # same PDF, drawn in the render pool; only the text lines cross over
+    path = plan.path if plan is not None else WORD_FILE
+    lines = list(_pdf_lines(query_range(path, start_date, end_date)))
+    return await render(render_pdf, lines, title)
+
+# ================= DELIVERY =================
+# Every report is prepared first (text built, PDF / chart rendered or
+# found in the cache) and then delivered. Keeping the two apart lets a
+# bundle render all its items at once and still send them in order.
+class Outgoing:
+    __slots__ = ("method", "kwargs", "kind", "data", "entry")
+
+    def __init__(self, method, kind=None, data=None, entry=None, **kwargs):
+        self.method = method
+        self.kwargs = kwargs
+        # for uploads: "document" / "photo", the raw bytes and the report
+        # cache entry that gets Telegram's file_id
+        self.kind = kind
+        self.data = data
+        self.entry = entry
+
+def _text(msg):
+    return Outgoing("send_message", text=msg, parse_mode="Markdown")
+
+async def _artifact(key, render_artifact, method, kind, **kwargs):
+    entry = report_cache.get(key)
+    if entry is None:
+        with RENDER_SECONDS.time(kind=kind):
+            entry = report_cache.put(key, await render_artifact())
+    # re-send by Telegram file_id when we already uploaded this artifact
+    kwargs[kind] = entry.file_id or entry.value
+    return Outgoing(method, kind, entry.value, entry, **kwargs)
+
+async def _call(bot, chat_id, out):
+    # flood limits and RetryAfter are handled by the broadcaster
+    return await broadcaster.send(bot, out.method, chat_id, **out.kwargs)
+
+async def _deliver(bot, chat_id, out):
+    if out is None:
+        return None
+    try:
+        message = await _call(bot, chat_id, out)
+    except BadRequest:
+        if out.kind is None or out.kwargs[out.kind] is out.data:
+            raise
+        # Telegram no longer knows the cached file_id, upload the bytes
+        out.kwargs[out.kind] = out.data
+        message = await _call(bot, chat_id, out)
+    if out.entry is not None:
+        # set on the entry itself, another cache lookup would count a hit
+        file_id = _file_id(message, out.kind)
+        if file_id:
+            out.entry.file_id = file_id
+    return message
+
+async def _send(context, user, prepare, metrics=None):
+    plan = load_plan(user.plan_path)
+    with REPORT_SECONDS.time(report=prepare.__name__.removeprefix("_prepare_")):
+        out = await prepare(plan, _get_metrics(plan, metrics))
+    await _deliver(context.bot, user.chat_id, out)
+
+def _registered_user(update):
+    return get_registry().get(update.effective_chat.id)
+
+# ================= PDF REPORTS =================
+async def _pdf(plan, start_date, end_date, title):
+    return await _artifact(
+        ("pdf", plan.path, start_date, end_date, title, plan.signature, plan.version),
+        lambda: generate_pdf_async(start_date, end_date, title, plan),
+        "send_document",
+        "document",
+        filename=_pdf_filename(title),
     )
-    with open(pdf,"rb") as f:
-        await cleanup(context.bot.send_document(chat_id=CHAT_ID, document=f),pdf)
 
-async def monthly_checker(context):
-    if (datetime.now(IST).date() + timedelta(days=1)).day == 1:
-        await send_monthly_report(context)
+async def _prepare_weekly_report(plan, m):
+    return await _pdf(plan, m.week_start, m.today, "Weekly Study Report")
 
+async def _prepare_monthly_report(plan, m):
+    return await _pdf(plan, m.lm_start, m.lm_end, f"Monthly Report {m.lm_start.strftime('%B %Y')}")
 
-# ================= SUNDAY SUMMARY =================
-async def send_sunday_summary(context):
-    today = datetime.now(IST).date()
-    start = today - timedelta(days=6)
+async def send_weekly_report(context, user):
+    await _send(context, user, _prepare_weekly_report)
 
-    table, headers = _get_table()
-    done = miss = 0
-    hard_topics = []
+async def send_monthly_report(context, user):
+    await _send(context, user, _prepare_monthly_report)
 
-    for row in table.rows:
-        d = _parse_date(row, headers)
-        if not d or not (start <= d <= today):
-            continue
-
-        s = row.cells[headers["status"]].text
-        h = row.cells[headers["hard topic"]].text
+@timed_handler("monthly_checker")
+async def monthly_checker(context):
+    if (datetime.now(IST).date() + timedelta(days=1)).day == 1:
+        for user in get_registry().all():
+            await send_monthly_report(context, user)
 
-        if "✅" in s:
-            done += 1
-        elif "❌" in s:
-            miss += 1
 
-        if h and h.lower() != "none":
-            hard_topics.append(f"• {d}: {h}")
+# ================= SUNDAY SUMMARY =================
+async def _prepare_sunday_summary(plan, m):
+    hard_topics = [f"• {d}: {h}" for d, h in m.week_hard]
 
-    msg = (
+    return _text(
         f"📌 *Weekly Summary*\n\n"
-        f"✅ Done: {done}\n"
-        f"❌ Missed: {miss}\n\n"
+        f"✅ Done: {m.week_done}\n"
+        f"❌ Missed: {m.week_miss}\n\n"
         f"🧠 *Hard Topics*\n"
         + ("\n".join(hard_topics) if hard_topics else "None 🎉")
     )
 
-    await context.bot.send_message(chat_id=CHAT_ID, text=msg, parse_mode="Markdown")
+async def send_sunday_summary(context, user, metrics=None):
+    await _send(context, user, _prepare_sunday_summary, metrics)
 
 
 # ================= GRAPHS =================
-async def _plot_and_send(x, y, title, file, caption, context):
-    plt.figure()
-    plt.plot(x, y, marker="o")
-    plt.yticks([0, 1], ["Miss", "Done"])
-    plt.title(title)
-    plt.grid(True)
-    file_path = os.path.join("/tmp", file)
-    plt.savefig(file_path)
-    plt.close()
-    with open(file_path,"rb") as f:
-        await cleanup (
-            context.bot.send_photo(
-            chat_id=CHAT_ID,
-            photo=f,
-            caption=caption
-            ),
-        file_path
-        )
-async def send_weekly_graph(context):
-    today = datetime.now(IST).date()
-    start = today - timedelta(days=6)
-
-    table, headers = _get_table()
-    x, y = [], []
-
-    for row in table.rows:
-        d = _parse_date(row, headers)
-        if not d or not (start <= d <= today):
-            continue
+def _render_chart(kind, x, y, title):
+    # matplotlib is loaded in the render workers, not in the bot process
+    from charts import render_chart
+    return render_chart(kind, x, y, title)
+
+async def _chart(kind, x, y, title, caption):
+    # the plotted data is the version here, same data -> same PNG
+    return await _artifact(
+        ("chart", kind, title, tuple(x), tuple(y)),
+        lambda: render(_render_chart, kind, x, y, title),
+        "send_photo",
+        "photo",
+        caption=caption,
+    )
 
-        x.append(d.strftime("%a"))
-        y.append(1 if "✅" in row.cells[headers["status"]].text else 0)
+async def _prepare_weekly_graph(plan, m):
+    x = [d.strftime("%a") for d, _ in m.week_points]
+    y = [v for _, v in m.week_points]
 
     if x:
-        await _plot_and_send(x, y, "Weekly Progress", "weekly.png", "📈 Weekly Progress", context)
-
-
-async def send_monthly_graph(context):
-    today = datetime.now(IST).date()
-    first = today.replace(day=1)
-    lm_end = first - timedelta(days=1)
-    lm_start = lm_end.replace(day=1)
+        return await _chart("weekly", x, y, "Weekly Progress", "📈 Weekly Progress")
 
-    table, headers = _get_table()
-    x, y = [], []
-
-    for row in table.rows:
-        d = _parse_date(row, headers)
-        if not d or not (lm_start <= d <= lm_end):
-            continue
-
-        x.append(d.day)
-        y.append(1 if "✅" in row.cells[headers["status"]].text else 0)
+async def _prepare_monthly_graph(plan, m):
+    x = [d.day for d, _ in m.month_points]
+    y = [v for _, v in m.month_points]
 
     if x:
-        await _plot_and_send(
+        return await _chart(
+            "monthly",
             x,
             y,
-            f"Monthly Progress {lm_start.strftime('%B')}",
-            "monthly.png",
+            f"Monthly Progress {m.lm_start.strftime('%B')}",
             "📊 Monthly Progress",
-            context,
         )
 
+async def send_weekly_graph(context, user, metrics=None):
+    await _send(context, user, _prepare_weekly_graph, metrics)
+
+async def send_monthly_graph(context, user, metrics=None):
+    await _send(context, user, _prepare_monthly_graph, metrics)
+
 
 # ================= CONSISTENCY =================
-async def send_consistency_score(context):
-    table, headers = _get_table()
-    total = done = 0
-
-    for row in table.rows:
-        s = row.cells[headers["status"]].text
-        if "✅" in s or "❌" in s:
-            total += 1
-            if "✅" in s:
-                done += 1
-
-    if not total:
-        await context.bot.send_message(
-            chat_id=CHAT_ID,
-            text="📈 *Consistency*: No data yet",
-            parse_mode="Markdown"
-        )
-        return
-    pct = round((done / total) * 100, 2)
-    await context.bot.send_message(
-        chat_id=CHAT_ID, text=f"📈 *Consistency*: {pct}%", parse_mode="Markdown"
-    )
+async def _prepare_consistency_score(plan, m):
+    if m.consistency is None:
+        return _text("📈 *Consistency*: No data yet")
+    msg = f"📈 *Consistency*: {round(m.consistency, 2)}%"
+    rolling = [
+        f"{label}: {round(pct, 2)}%"
+        for label, pct in (("Last 7 days", m.rolling_7), ("Last 30 days", m.rolling_30))
+        if pct is not None
+    ]
+    if rolling:
+        msg += "\n" + " · ".join(rolling)
+    return _text(msg)
+
+async def send_consistency_score(context, user, metrics=None):
+    await _send(context, user, _prepare_consistency_score, metrics)
 
 # ================= BEST STREAK =================
-async def send_best_streak(context):
-    table, headers = _get_table()
-    best = cur = 0
-
-    for row in table.rows:
-        if "✅" in row.cells[headers["status"]].text:
-            cur += 1
-            best = max(best, cur)
-        else:
-            cur = 0
-
-    await context.bot.send_message(
-        chat_id=CHAT_ID, text=f"🏆 *Best Streak*: {best} days", parse_mode="Markdown"
-    )
+async def _prepare_best_streak(plan, m):
+    return _text(f"🏆 *Best Streak*: {m.best_streak} days")
 
+async def send_best_streak(context, user, metrics=None):
+    await _send(context, user, _prepare_best_streak, metrics)
 
-# ================= STUDY SCORE =================
-async def send_study_score(context):
-    table, headers = _get_table()
-    score = max_score = 0
-
-    for row in table.rows:
-        s = row.cells[headers["status"]].text
-        h = row.cells[headers["hard topic"]].text.lower()
-
-        if "✅" in s or "❌" in s:
-            max_score += 10
-            if "✅" in s:
-                score += max(10 - (2 if h != "none" else 0), 0)
-
-    if not max_score:
-        await context.bot.send_message(
-            chat_id=CHAT_ID,
-            text="🧮 *Study Score*: No data yet",
-            parse_mode="Markdown"
-        )
-        return
-    pct = round((score / max_score) * 100, 2)
-    await context.bot.send_message(
-        chat_id=CHAT_ID, text=f"🧮 *Study Score*: {pct}%", parse_mode="Markdown"
-    )       
-# ================= HARD TOPIC ANALYTICS =================
-async def send_hard_topic_analytics(context):
-    table, headers = _get_table()
-    topics = []
 
-    for row in table.rows:
-        h = row.cells[headers["hard topic"]].text
-        if h and h.lower() != "none":
-            topics.append(h)
+# ================= STUDY SCORE =================
+async def _prepare_study_score(plan, m):
+    if m.study_score is None:
+        return _text("🧮 *Study Score*: No data yet")
+    return _text(f"🧮 *Study Score*: {round(m.study_score, 2)}%")
 
-    if not topics:
-        msg = "🧠 *Hard Topics*: None 🎉"
-    else:
-        c = Counter(topics).most_common(5)
-        msg = "🧠 *Hard Topic Analytics*\n\n" + "\n".join(
-            f"• {t} → {n}" for t, n in c
-        )
+async def send_study_score(context, user, metrics=None):
+    await _send(context, user, _prepare_study_score, metrics)
+# ================= HARD TOPIC ANALYTICS =================
+async def _prepare_hard_topic_analytics(plan, m):
+    if not m.hard_counts:
+        return _text("🧠 *Hard Topics*: None 🎉")
+    c = m.hard_counts.most_common(5)
+    return _text("🧠 *Hard Topic Analytics*\n\n" + "\n".join(
+        f"• {t} → {n}" for t, n in c
+    ))
 
-    await context.bot.send_message(chat_id=CHAT_ID, text=msg, parse_mode="Markdown")
+async def send_hard_topic_analytics(context, user, metrics=None):
+    await _send(context, user, _prepare_hard_topic_analytics, metrics)
 
 
 # ================= MONTH COMPARISON =================
-async def send_month_comparison(context):
-    table, headers = _get_table()
-    today = datetime.now(IST).date()
-
-    first = today.replace(day=1)
-    lm_end = first - timedelta(days=1)
-    lm_start = lm_end.replace(day=1)
-    pm_end = lm_start - timedelta(days=1)
-    pm_start = pm_end.replace(day=1)
-
-    def count(start, end):
-        c = 0
-        for row in table.rows:
-            d = _parse_date(row, headers)
-            if d and start <= d <= end and "✅" in row.cells[headers["status"]].text:
-                c += 1
-        return c
-
-    lm, pm = count(lm_start, lm_end), count(pm_start, pm_end)
-    trend = "📈 Improved" if lm > pm else "📉 Declined" if lm < pm else "➖ Same"
-
-    msg = (
+async def _prepare_month_comparison(plan, m):
+    return _text(
         f"🏅 *Month Comparison*\n\n"
-        f"{pm_start.strftime('%B')}: {pm}\n"
-        f"{lm_start.strftime('%B')}: {lm}\n\n"
-        f"Trend: *{trend}*"
+        f"{m.pm_start.strftime('%B')}: {m.pm_done}\n"
+        f"{m.lm_start.strftime('%B')}: {m.lm_done}\n\n"
+        f"Trend: *{m.trend}*"
     )
 
-    await context.bot.send_message(chat_id=CHAT_ID, text=msg, parse_mode="Markdown")
+async def send_month_comparison(context, user, metrics=None):
+    await _send(context, user, _prepare_month_comparison, metrics)
 
 
 # ================= AI MOTIVATION =================
-async def send_ai_motivation(context):
-    table, headers = _get_table()
-    score = max_score = 0
-
-    for row in table.rows:
-        s = row.cells[headers["status"]].text
-        h = row.cells[headers["hard topic"]].text.lower()
-
-        if "✅" in s or "❌" in s:
-            max_score += 10
-            if "✅" in s:
-                score += max(10 - (2 if h != "none" else 0), 0)
-
-    if not max_score:
-        await context.bot.send_message(
-            chat_id=CHAT_ID,
-            text="🤖 *AI Motivation*\n\nNo study data yet. Let’s start strong 💪",
-            parse_mode="Markdown"
-        )
-        return
+async def _prepare_ai_motivation(plan, m):
+    if m.study_score is None:
+        return _text("🤖 *AI Motivation*\n\nNo study data yet. Let’s start strong 💪")
 
-    pct = (score / max_score) * 100
+    pct = m.study_score
 
     if pct >= 85:
         msg = "🔥 Elite consistency! Keep dominating 🚀"
@@ -456,13 +301,67 @@ async def send_ai_motivation(context):
     else:
         msg = "⚠️ Reset time. Small wins daily."
 
-    await context.bot.send_message(
-        chat_id=CHAT_ID, text=f"🤖 *AI Motivation*\n\n{msg}", parse_mode="Markdown"
-    )
+    return _text(f"🤖 *AI Motivation*\n\n{msg}")
+
+async def send_ai_motivation(context, user, metrics=None):
+    await _send(context, user, _prepare_ai_motivation, metrics)
+
+
+# ================= BUNDLES =================
+WEEKLY_BUNDLE = (
+    ("weekly report", _prepare_weekly_report),
+    ("weekly summary", _prepare_sunday_summary),
+    ("weekly graph", _prepare_weekly_graph),
+    ("consistency", _prepare_consistency_score),
+    ("best streak", _prepare_best_streak),
+    ("study score", _prepare_study_score),
+    ("hard topics", _prepare_hard_topic_analytics),
+    ("AI motivation", _prepare_ai_motivation),
+)
+MONDAY_BUNDLE = WEEKLY_BUNDLE + (
+    ("monthly graph", _prepare_monthly_graph),
+    ("month comparison", _prepare_month_comparison),
+)
+BUNDLE_RENDER_LIMIT = 4
+BUNDLE_USERS = 8
+
+async def run_bundle(bot, user, items):
+    # metrics once, every item prepared concurrently, delivery in bundle order;
+    # a failing item is reported and skipped instead of ending the bundle
+    chat_id = user.chat_id
+    plan = load_plan(user.plan_path)
+    metrics = _get_metrics(plan)
+    limit = asyncio.Semaphore(BUNDLE_RENDER_LIMIT)
+
+    async def prepare(name, fn):
+        async with limit:
+            with REPORT_SECONDS.time(report=name):
+                return await fn(plan, metrics)
+
+    tasks = [asyncio.create_task(prepare(name, fn)) for name, fn in items]
+    failed = []
+    for (name, _), task in zip(items, tasks):
+        try:
+            await _deliver(bot, chat_id, await task)
+        except Exception:
+            logging.exception("Report %s failed", name)
+            failed.append(name)
+
+    if failed:
+        await broadcaster.send(
+            bot, "send_message", chat_id,
+            text="⚠️ Some reports could not be sent: " + ", ".join(failed),
+        )
+    return failed
 
 
 # ================= COMMAND =================
+@timed_handler("report_command")
 async def report_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = _registered_user(update)
+    if user is None:
+        await update.message.reply_text("❌ You are not registered yet. Use /start first.")
+        return
     try:
         start = datetime.strptime(context.args[0], "%Y-%m-%d").date()
         end = datetime.strptime(context.args[1], "%Y-%m-%d").date()
@@ -471,43 +370,81 @@ async def report_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "❌ Invalid command usage. Use /report YYYY-MM-DD YYYY-MM-DD"
         )
         return
-    pdf = generate_pdf(start, end, f"Study Report {start} to {end}")
-    with open(pdf, "rb") as f:
-        await cleanup(update.message.reply_document(f),pdf)
+    out = await _pdf(load_plan(user.plan_path), start, end, f"Study Report {start} to {end}")
+    await _deliver(context.bot, user.chat_id, out)
+
+# ================= HARD TOPIC SEARCH =================
+def _topic_lines(topics):
+    return "\n".join(f"• {t} → {n}" for t, n in topics)
+
+@timed_handler("hard_topics_command")
+async def hard_topics_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # /hardtopics: top topics this week / month / overall
+    # /hardtopics <query>: topics starting with or containing the query
+    user = _registered_user(update)
+    if user is None:
+        await update.message.reply_text("❌ You are not registered yet. Use /start first.")
+        return
+    agg = plan_aggregates(load_plan(user.plan_path))
+    counts, labels = agg["hard"], agg["labels"]
+    query = " ".join(context.args or ())
+    if query:
+        found = topic_index(user.plan_path, counts).search(query, counts, labels)
+        if not found:
+            await update.message.reply_text(f"🔎 No hard topics match “{query}”")
+            return
+        await update.message.reply_text(f"🔎 Hard topics matching “{query}”\n\n" + _topic_lines(found))
+        return
+    if not counts:
+        await update.message.reply_text("🧠 Hard Topics: None 🎉")
+        return
+    today = datetime.now(IST).date()
+    sections = []
+    for title, bucket in (
+        ("This week", hard_bucket(user.plan_path, "week", today)),
+        ("This month", hard_bucket(user.plan_path, "month", today)),
+        ("All time", counts),
+    ):
+        if bucket:
+            sections.append(f"{title}\n" + _topic_lines(top_k(bucket, labels)))
+    await update.message.reply_text("🧠 Hard Topics\n\n" + "\n\n".join(sections))
 
 # ================= TUESDAY MANUAL WEEKLY =================
+@timed_handler("manual_weekly_command")
 async def manual_weekly_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = _registered_user(update)
+    if user is None:
+        await update.message.reply_text("❌ You are not registered yet. Use /start first.")
+        return
     # Tuesday = 1
     if datetime.now(IST).weekday() != 6:
         await update.message.reply_text(
             "❌ Manual weekly reports are only available on Sunday."
         )
         return
-    await send_weekly_report(context)
-    await send_sunday_summary(context)
-    await send_weekly_graph(context)
-    await send_consistency_score(context)
-    await send_best_streak(context)
-    await send_study_score(context)
-    await send_hard_topic_analytics(context)
-    await send_ai_motivation(context)
+    await run_bundle(context.bot, user, WEEKLY_BUNDLE)
     await update.message.reply_text("✅ Weekly reports sent manually.")
+@timed_handler("monday_bundle")
 async def monday_bundle(context):
-    await send_weekly_report(context)
-    await send_sunday_summary(context)
-    await send_weekly_graph(context)
-    await send_consistency_score(context)
-    await send_best_streak(context)
-    await send_study_score(context)
-    await send_hard_topic_analytics(context)
-    await send_ai_motivation(context)
-    await send_monthly_graph(context)
-    await send_month_comparison(context)
+    # one tick for the whole cohort, a few users at a time (the per-chat
+    # limit paces each bundle, so they overlap); a user whose plan cannot
+    # be read is logged and skipped
+    limit = asyncio.Semaphore(BUNDLE_USERS)
+
+    async def one(user):
+        async with limit:
+            try:
+                await run_bundle(context.bot, user, MONDAY_BUNDLE)
+            except Exception:
+                logging.exception("Weekly bundle for chat %s failed", user.chat_id)
+
+    await asyncio.gather(*(one(user) for user in get_registry().all()))
 
 # ================= REGISTER =================
 def register_reports(app):
     app.add_handler(CommandHandler("report", report_command))
     app.add_handler(CommandHandler("weekly", manual_weekly_command))
+    app.add_handler(CommandHandler("hardtopics", hard_topics_command))
     if app.job_queue is None:
         print("❌ JobQueue not available")
         return
@@ -9,25 +9,46 @@ def force_ipv4():
 force_ipv4()
 # ============================================================
 import os
-import time
-import json
 import shutil
 import logging
 import warnings
 import sys
+import time
+import asyncio
+import subprocess
+import tempfile
+import threading
 from datetime import datetime, time as dt_time
-from docx import Document
+# ================= PROFILE RUN =================
+# --profile-startup runs against a scratch DATA_DIR, set before config is
+# imported; the -X importtime child inherits it. Profiling never creates
+# or touches the real volume.
+if __name__ == "__main__" and "--profile-startup" in sys.argv:
+    os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="plan-bot-profile-")
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
     ApplicationBuilder,
     CallbackQueryHandler,
+    CommandHandler,
     ContextTypes,
     MessageHandler,
     filters,
 )
 from reports import register_reports
-from config import WORD_FILE, CHAT_ID, IST, BOT_TOKEN
-from drive import upload_to_drive
+from config import WORD_FILE, PLAN_TEMPLATE, IST, BOT_TOKEN, CHAT_ID
+from drive_sync import sync_worker
+import render_pool
+from edit_journal import get_journal
+from plan_model import load_plan, ensure_imported, header_map, record_value, status_code, STATUS_TEXT, REQUIRED
+from docx_stream import iter_table_rows
+from plan_store import get_plan_store
+from aggregates import record_change, aggregates_match, rebuild_aggregates
+from users import get_registry
+from state_store import get_state, awaiting_key
+from edit_coalescer import EditCoalescer
+import metrics
+from metrics import registry, timed_handler
+from broadcast import broadcaster
 from telegram.warnings import PTBUserWarning
 warnings.filterwarnings("ignore", category=PTBUserWarning)
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -42,235 +63,472 @@ logging.getLogger("apscheduler").setLevel(logging.WARNING)
 logging.getLogger("telegram").setLevel(logging.WARNING)
 
 # ================= CONSTANTS =================
-START_DATE = "2026-01-12"
-STATE_FILE = "bot_state.json"
 EVENING_RETRY_JOB = "evening_retry"
+EVENING_MAX_SENDS = 2
+EVENING_RETRY_DELAY = 300  # 5 minutes (FIXED)
 HARD_TOPIC_TIMEOUT_JOB = "hard_topic_timeout"
-REQUIRED_COLUMNS = {"status", "hard topic"}
+STARTUP_BUDGET_MS = int(os.getenv("STARTUP_BUDGET_MS", "1500"))
+FLUSH_TICK = 10  # seconds between checks for documents ready to be written
+DOCX_SECONDS = registry.histogram("docx_seconds", "Word file open / save")
+EDITS_WRITTEN = registry.counter("edits_materialized_total", "Store values written into Word exports")
 # ================= INIT WORD FILE =================
 word_dir = os.path.dirname(WORD_FILE)
 if word_dir and not os.path.exists(word_dir):
     os.makedirs(word_dir, exist_ok=True)  # 🔴 FIX: create /data
 if not os.path.exists(WORD_FILE):
-    shutil.copy("placepment_plan.docx", WORD_FILE)
+    shutil.copy(PLAN_TEMPLATE, WORD_FILE)
     print("📄 Word file copied to volume")
-# ================= STATE HANDLING =================
-def load_state():
-    if not os.path.exists(STATE_FILE):
-        return {}
-    with open(STATE_FILE, "r") as f:
-        return json.load(f)
-def save_state(state):
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f)
 # ================= WORD SAFETY =================
 def safe_open_docx(path):
     try:
-        return Document(path)
+        from docx import Document
+        with DOCX_SECONDS.time(op="open"):
+            return Document(path)
     except Exception:
         logging.exception("Failed to open Word file")
         return None
 def safe_save_docx(doc, path):
+    # write next to the target and rename, so the Drive worker never
+    # uploads a half-written file
+    tmp_path = path + ".tmp"
     try:
-        doc.save(path)
+        with DOCX_SECONDS.time(op="save"):
+            doc.save(tmp_path)
+            os.replace(tmp_path, path)
         return True
     except Exception:
         logging.exception("Failed to save Word file")
         return False
-def validate_word_structure():
-    doc = safe_open_docx(WORD_FILE)
-    if not doc or not doc.tables:
-        raise RuntimeError("Word file has no tables")
-    headers = {
-        cell.text.strip().lower()
-        for cell in doc.tables[0].rows[0].cells
-    }
-    missing = REQUIRED_COLUMNS - headers
+def validate_word_structure(path=WORD_FILE):
+    # every table of the Word file needs a header row with the plan
+    # columns; the exporter writes into its status / hard topic cells
+    tables, with_headers = set(), set()
+    try:
+        for t, _, cells in iter_table_rows(path):
+            tables.add(t)
+            if t not in with_headers and header_map(cells):
+                with_headers.add(t)
+    except Exception as e:
+        raise RuntimeError(f"{path} could not be read: {e}")
+    if not tables:
+        raise RuntimeError(f"{path} has no tables")
+    missing = sorted(tables - with_headers)
     if missing:
-        raise RuntimeError(f"Missing required columns: {missing}")
-LAST_UPLOAD_TS=0
+        raise RuntimeError(f"Tables {missing} in {path} have no header row with {sorted(REQUIRED)}")
 # ================= HELPERS =================
-def upload_with_retry(local_file, filename, retries=3, delay=2):
-    global LAST_UPLOAD_TS
-    now=time.time()
-    if now-LAST_UPLOAD_TS < 60:
-        logging.info("skipping drive upload(recently synced)")
-        return True
-    for attempt in range(1, retries + 1):
-        if upload_to_drive(local_file, filename):
-            logging.info("Drive sync successful (attempt %s)", attempt)
-            return True
-        logging.warning("Drive sync failed (attempt %s/%s)", attempt, retries)
-        time.sleep(delay)
-    logging.error("Drive sync failed after all retries")
-    return False
-def get_day_number():
-    start = datetime.strptime(START_DATE, "%Y-%m-%d").date()
-    today = datetime.now(IST).date()
-    if today < start:
-        return None
-    return (today - start).days + 1
-def get_table_and_row(doc, day):
-    table_index = (day - 1) // 7
-    row_index = ((day - 1) % 7) + 1
-    if table_index >= len(doc.tables):
-        return None, None
-    return doc.tables[table_index], row_index
-def find_column_index(table, column_name):
-    for i, cell in enumerate(table.rows[0].cells):
-        if cell.text.strip().lower() == column_name.lower():
-            return i
-    return None
+def today_ist():
+    return datetime.now(IST).date()
+def active_users():
+    # registered users whose plan has started
+    today = today_ist()
+    return [u for u in get_registry().all() if u.day_number(today) is not None]
+async def fan_out(bot, chat_ids, text, reply_markup=None):
+    # rate limited and concurrent; a failing chat (blocked the bot, left the
+    # group) is logged by the broadcaster and does not stop the rest
+    results = await broadcaster.broadcast(bot, chat_ids, text=text, reply_markup=reply_markup)
+    return [chat_id for chat_id, result in results if not isinstance(result, Exception)]
 # ================= WORD UPDATE =================
-def update_status_in_word(symbol):
-    day = get_day_number()
-    if day is None:
+def record_edit(user, column, value):
+    today = today_ist()
+    if user.day_number(today) is None:
+        return False
+    # the store is the record; the journal tells the exporter which rows changed
+    change = record_value(user.plan_path, today, column, value)
+    if change is None:
+        logging.warning("No row for %s in %s, %s not recorded", today, user.plan_path, column)
+        return True
+    record_change(user.plan_path, *change)
+    get_journal().record(user.plan_path, today, column, value)
+    coalescer.touch(user.plan_path)
+    return True
+def update_status_in_word(user, symbol):
+    if record_edit(user, "status", symbol):
+        logging.info("Status recorded for chat %s, day %s", user.chat_id, user.day_number(today_ist()))
+def _cell_lookup(doc):
+    # doc.tables, table.rows and row.cells build fresh proxies on every
+    # access; resolve each table once and each edited row's cells once
+    tables = doc.tables
+    rows = {}
+    def cell(table, row, col):
+        cells = rows.get((table, row))
+        if cells is None:
+            cells = rows[(table, row)] = tables[table].rows[row].cells
+        return cells[col]
+    return cell
+def materialize_edits(path, drive_name, full=False):
+    # exports the store's rows into the Word file: the rows the journal
+    # says changed, or with full=True every row that differs
+    journal = get_journal()
+    edits = journal.pending(path)
+    if not edits and not full:
         return
-    doc = safe_open_docx(WORD_FILE)
+    plan = load_plan(path)
+    if full:
+        positions = range(len(plan.rows))
+    else:
+        dates = {datetime.strptime(date, "%Y-%m-%d").date() for _, date, _, _ in edits}
+        positions = {plan.index.by_date[d] for d in dates if d in plan.index.by_date}
+    doc = safe_open_docx(path)
     if not doc:
         return
-    table, row = get_table_and_row(doc, day)
-    if not table or row >= len(table.rows):
+    cell = _cell_lookup(doc)
+    written = 0
+    for pos in positions:
+        row = plan.rows[pos]
+        columns = plan.index.columns[row.table]
+        status = cell(row.table, row.row, columns["status"])
+        if status_code(status.text) != row.status:
+            status.text = STATUS_TEXT[row.status]
+            written += 1
+        hard = cell(row.table, row.row, columns["hard topic"])
+        if hard.text.strip() != row.hard:
+            hard.text = row.hard
+            written += 1
+    if written and not safe_save_docx(doc, path):
         return
-    status_col = find_column_index(table, "status")
-    if status_col is None:
+    if edits:
+        journal.mark_applied(path, edits[-1][0])
+    if written or full:
+        sync_worker.submit(path, drive_name)
+    if written:
+        EDITS_WRITTEN.inc(written)
+        logging.info("Wrote %s cells into %s", written, path)
+_WRITE_LOCKS = {}
+_WRITE_LOCKS_GUARD = threading.Lock()
+def _write_lock(path):
+    with _WRITE_LOCKS_GUARD:
+        return _WRITE_LOCKS.setdefault(path, threading.Lock())
+def flush_document(path, full=False):
+    # blocking (python-docx open / save); one writer per document at a time
+    user = get_registry().by_plan(path)
+    if user is None:
+        logging.warning("Pending edits for unknown plan %s, skipping", path)
         return
-    table.rows[row].cells[status_col].text = symbol
-    if not safe_save_docx(doc, WORD_FILE):
+    try:
+        with _write_lock(path):
+            materialize_edits(path, user.drive_name, full)
+    except Exception:
+        # the edits stay in the journal for the next flush
+        logging.exception("Writing edits into %s failed", path)
+async def write_document(path, full=False):
+    # off the event loop: a long plan takes most of a second to export
+    await asyncio.to_thread(flush_document, path, full)
+coalescer = EditCoalescer(write_document)
+registry.gauge("edit_coalescer_pending_docs", "Documents with edits waiting to be written", coalescer.pending)
+async def materialize_all():
+    # every document with journal edits, whether or not the coalescer saw them
+    paths = await asyncio.to_thread(get_journal().pending_docs)
+    await asyncio.gather(*(coalescer.flush_path(path) for path in paths))
+@timed_handler("flush_tick")
+async def flush_tick(context: ContextTypes.DEFAULT_TYPE):
+    await coalescer.flush_due()
+@timed_handler("flush_edits_job")
+async def flush_edits_job(context: ContextTypes.DEFAULT_TYPE):
+    await materialize_all()
+# ================= REGISTRATION =================
+@timed_handler("start_command")
+async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    registry = get_registry()
+    chat_id = update.effective_chat.id
+    user = registry.get(chat_id)
+    if user is not None:
+        await update.message.reply_text(
+            f"👋 You are already registered. Your plan started on {user.start_date}."
+        )
         return
-    upload_with_retry(WORD_FILE, "placepment_plan.docx")
-    logging.info("Status updated for day %s", day)
-# ================= EVENING =================
-async def evening_buttons(context: ContextTypes.DEFAULT_TYPE):
-    retries = context.bot_data.get("evening_retry_count", 0)
-    if retries >= 2:
-        context.bot_data["evening_retry_count"] = 0
+    try:
+        start = (
+            datetime.strptime(context.args[0], "%Y-%m-%d").date()
+            if context.args else today_ist()
+        )
+    except ValueError:
+        await update.message.reply_text("❌ Invalid date. Use /start or /start YYYY-MM-DD")
         return
-    keyboard = [[
-        InlineKeyboardButton("✅ Yes", callback_data="evening_yes"),
-        InlineKeyboardButton("❌ No", callback_data="evening_no"),
-    ]]
-    await context.bot.send_message(
-        chat_id=CHAT_ID,
-        text="Have you started studying 📔 ?",
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    try:
+        # a plan copy (python-docx open / save) and its import, off the loop
+        user = await asyncio.to_thread(registry.register, chat_id, start)
+    except Exception:
+        logging.exception("Registering chat %s failed", chat_id)
+        await update.message.reply_text("❌ Could not create your plan, try again later.")
+        return
+    logging.info("Registered chat %s starting %s", chat_id, start)
+    await update.message.reply_text(
+        f"✅ Registered! Your plan starts on {user.start_date}.\n"
+        "You will get a reminder every evening and a check-in every night."
     )
-    context.bot_data["evening_retry_count"] = retries + 1
+# ================= EVENING =================
+EVENING_KEYBOARD = InlineKeyboardMarkup([[
+    InlineKeyboardButton("✅ Yes", callback_data="evening_yes"),
+    InlineKeyboardButton("❌ No", callback_data="evening_no"),
+]])
+async def send_evening(context, pending):
+    # pending: chat id -> reminders sent so far today
+    due = [chat_id for chat_id, sends in pending.items() if sends < EVENING_MAX_SENDS]
+    await fan_out(context.bot, due, "Have you started studying 📔 ?", EVENING_KEYBOARD)
+    for chat_id in due:
+        # whoever tapped Yes during the fan-out is already gone
+        if chat_id in pending:
+            pending[chat_id] += 1
+    for chat_id in [c for c, sends in pending.items() if sends >= EVENING_MAX_SENDS]:
+        del pending[chat_id]
     for job in context.job_queue.get_jobs_by_name(EVENING_RETRY_JOB):
         job.schedule_removal()
-    context.job_queue.run_once(
-        evening_buttons,
-        when=300,  # 5 minutes (FIXED)
-        name=EVENING_RETRY_JOB
-    )
+    # a single retry tick covers everyone who has not answered yet
+    if pending:
+        context.job_queue.run_once(
+            evening_retry,
+            when=EVENING_RETRY_DELAY,
+            name=EVENING_RETRY_JOB
+        )
+@timed_handler("evening_buttons")
+async def evening_buttons(context: ContextTypes.DEFAULT_TYPE):
+    pending = context.bot_data["evening_pending"] = {
+        user.chat_id: 0 for user in active_users()
+    }
+    await send_evening(context, pending)
+@timed_handler("evening_retry")
+async def evening_retry(context: ContextTypes.DEFAULT_TYPE):
+    await send_evening(context, context.bot_data.setdefault("evening_pending", {}))
 # ================= NIGHT =================
+NIGHT_KEYBOARD = InlineKeyboardMarkup([[
+    InlineKeyboardButton("✅ Yes", callback_data="night_yes"),
+    InlineKeyboardButton("❌ No", callback_data="night_no"),
+]])
+@timed_handler("night_buttons")
 async def night_buttons(context: ContextTypes.DEFAULT_TYPE):
-    keyboard = [[
-        InlineKeyboardButton("✅ Yes", callback_data="night_yes"),
-        InlineKeyboardButton("❌ No", callback_data="night_no"),
-    ]]
-    await context.bot.send_message(
-        chat_id=CHAT_ID,
-        text="Did you complete today’s portion?",
-        reply_markup=InlineKeyboardMarkup(keyboard),
+    await fan_out(
+        context.bot,
+        [user.chat_id for user in active_users()],
+        "Did you complete today’s portion?",
+        NIGHT_KEYBOARD,
     )
 # ================= CALLBACK =================
+@timed_handler("button_callback")
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    state = load_state()
+    chat_id = query.message.chat_id
+    user = get_registry().get(chat_id)
+    if user is None:
+        await query.edit_message_text("❌ You are not registered yet. Use /start first.")
+        return
     if query.data == "evening_yes":
-        context.bot_data["evening_retry_count"] = 0
-        for job in context.job_queue.get_jobs_by_name(EVENING_RETRY_JOB):
-            job.schedule_removal()
+        context.bot_data.setdefault("evening_pending", {}).pop(chat_id, None)
         await query.edit_message_text("👍 Good, start studying 💪")
     elif query.data == "evening_no":
         await query.edit_message_text("⏳ Okay, I’ll remind you again in 5 minutes.")
     elif query.data == "night_yes":
-        update_status_in_word("✅")
-        state["awaiting_hard_topic"] = True
-        save_state(state)
-        for job in context.job_queue.get_jobs_by_name(HARD_TOPIC_TIMEOUT_JOB):
+        update_status_in_word(user, "✅")
+        # the hard topic (or its timeout) follows, write both edits together
+        coalescer.hold(user.plan_path)
+        get_state().set(awaiting_key(chat_id), True)
+        job_name = f"{HARD_TOPIC_TIMEOUT_JOB}:{chat_id}"
+        for job in context.job_queue.get_jobs_by_name(job_name):
             job.schedule_removal()
         context.job_queue.run_once(
             hard_topic_timeout,
             when=120,
-            name=HARD_TOPIC_TIMEOUT_JOB,
-            chat_id=query.message.chat_id,
+            name=job_name,
+            chat_id=chat_id,
         )
         await query.edit_message_text(
             "🎉 Marked as COMPLETED ✅\n\nWhich topic did you find hard today?"
         )
     elif query.data == "night_no":
-        update_status_in_word("❌")
+        update_status_in_word(user, "❌")
         await query.edit_message_text(
             "⚠️ Marked as NOT completed ❌\nTry again tomorrow 💪"
         )
 # ================= HARD TOPIC =================
+@timed_handler("hard_topic_timeout")
 async def hard_topic_timeout(context: ContextTypes.DEFAULT_TYPE):
-    state = load_state()
-    if not state.get("awaiting_hard_topic"):
-        return
-    day = get_day_number()
-    if day is None:
-        return
-    doc = safe_open_docx(WORD_FILE)
-    if not doc:
-        return
-    table, row = get_table_and_row(doc, day)
-    if not table:
-        return
-    hard_col = find_column_index(table, "hard topic")
-    if hard_col is not None and row < len(table.rows):
-        table.rows[row].cells[hard_col].text = "None"
-        safe_save_docx(doc, WORD_FILE)
-        upload_with_retry(WORD_FILE, "placepment_plan.docx")
-    state["awaiting_hard_topic"] = False
-    save_state(state)
+    chat_id = context.job.chat_id
+    state, key = get_state(), awaiting_key(chat_id)
+    # the answer and the timeout race for the same flag
+    async with state.lock(key):
+        if not state.get(key):
+            return
+        user = get_registry().get(chat_id)
+        if user is None or not record_edit(user, "hard topic", "None"):
+            return
+        state.delete(key)
+    coalescer.release(user.plan_path)
     await context.bot.send_message(
-        chat_id=context.job.chat_id,
+        chat_id=chat_id,
         text="⏰ No response received. Hard topic marked as None."
     )
+@timed_handler("hard_topic_handler")
 async def hard_topic_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    state = load_state()
-    if not state.get("awaiting_hard_topic"):
-        return
-    topic = update.message.text
-    day = get_day_number()
-    if day is None:
-        return
-    doc = safe_open_docx(WORD_FILE)
-    if not doc:
+    chat_id = update.effective_chat.id
+    state, key = get_state(), awaiting_key(chat_id)
+    async with state.lock(key):
+        if not state.get(key):
+            return
+        user = get_registry().get(chat_id)
+        if user is None or not record_edit(user, "hard topic", update.message.text):
+            return
+        state.delete(key)
+    coalescer.release(user.plan_path)
+    await update.message.reply_text("📝 Hard topic saved successfully ✅")
+@timed_handler("sync_command")
+async def sync_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # export the caller's whole plan now instead of waiting for the tick
+    user = get_registry().get(update.effective_chat.id)
+    if user is None:
+        await update.message.reply_text("❌ You are not registered yet. Use /start first.")
         return
-    table, row = get_table_and_row(doc, day)
-    if not table:
+    await write_document(user.plan_path, full=True)
+    await update.message.reply_text("💾 Your plan is saved and queued for Drive sync.")
+@timed_handler("stats_command")
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # admin only: the bot owner's chat
+    if CHAT_ID is None or update.effective_chat.id != CHAT_ID:
         return
-    hard_col = find_column_index(table, "hard topic")
-    if hard_col is not None and row < len(table.rows):
-        table.rows[row].cells[hard_col].text = topic
-        safe_save_docx(doc, WORD_FILE)
-        upload_with_retry(WORD_FILE, "placepment_plan.docx")
-    state["awaiting_hard_topic"] = False
-    save_state(state)
-    await update.message.reply_text("📝 Hard topic saved successfully ✅")
+    await update.message.reply_text("📊 Stats\n\n" + registry.summary())
 # ================= APP =================
-validate_word_structure()
-app = ApplicationBuilder().token(BOT_TOKEN).build()
-app.add_handler(CallbackQueryHandler(button_callback))
-app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, hard_topic_handler))
-register_reports(app)
-# ================= SCHEDULE =================
-ALL_DAYS = (0, 1, 2, 3, 4, 5, 6)
-app.job_queue.run_daily(
-    evening_buttons,
-    time=dt_time(hour=17, minute=30, tzinfo=IST),
-    days=ALL_DAYS
-)
-app.job_queue.run_daily(
-    night_buttons,
-    time=dt_time(hour=22, minute=30, tzinfo=IST),
-    days=ALL_DAYS
-)
+async def shutdown(app):
+    # pending edits first, then let the Drive worker drain
+    await materialize_all()
+    metrics.stop_http()
+    sync_worker.stop()
+    render_pool.shutdown()
+def import_plans():
+    # plans not in the store yet (first run after the upgrade) are read
+    # from their .docx once, off the event loop; a handler needing one
+    # of them meanwhile waits for its import instead of starting another
+    for user in get_registry().all():
+        try:
+            if ensure_imported(user.plan_path):
+                logging.info("Imported %s into the plan store", user.plan_path)
+        except Exception:
+            logging.exception("Importing %s failed", user.plan_path)
+def _aggregates_match(path):
+    return aggregates_match(load_plan(path))
+async def verify_plans():
+    # the saved running totals against a full recount, once per start; the
+    # recount runs on a worker thread, a rebuild (state writes) on the loop
+    for user in get_registry().all():
+        try:
+            if not await asyncio.to_thread(_aggregates_match, user.plan_path):
+                logging.warning("Aggregates of %s were out of date, rebuilding them", user.plan_path)
+                rebuild_aggregates(load_plan(user.plan_path))
+        except Exception:
+            logging.exception("Checking the aggregates of %s failed", user.plan_path)
+def validate_plans():
+    # every registered plan is a copy of the template
+    validate_word_structure(PLAN_TEMPLATE)
+    validate_word_structure(WORD_FILE)
+async def startup_checks(context: ContextTypes.DEFAULT_TYPE):
+    # runs as the first job once polling is up, so a restart answers
+    # updates right away instead of after reading every plan
+    render_pool.warm_up()
+    await asyncio.to_thread(import_plans)
+    await materialize_all()  # export anything left over from a previous run
+    await verify_plans()
+    try:
+        await asyncio.to_thread(validate_plans)
+    except RuntimeError:
+        logging.critical("Plan validation failed, stopping", exc_info=True)
+        context.application.stop_running()
+        return
+    logging.info("Startup checks done")
+def build_app():
+    sync_worker.start()
+    metrics.start_http()
+    get_registry()
+    get_state()
+    get_plan_store()
+    app = ApplicationBuilder().token(BOT_TOKEN).post_shutdown(shutdown).build()
+    app.add_handler(CommandHandler("start", start_command))
+    app.add_handler(CommandHandler("sync", sync_command))
+    app.add_handler(CommandHandler("stats", stats_command))
+    app.add_handler(CallbackQueryHandler(button_callback))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, hard_topic_handler))
+    register_reports(app)
+    # ================= SCHEDULE =================
+    # one job per reminder for the whole cohort, not one per user
+    ALL_DAYS = (0, 1, 2, 3, 4, 5, 6)
+    app.job_queue.run_daily(
+        evening_buttons,
+        time=dt_time(hour=17, minute=30, tzinfo=IST),
+        days=ALL_DAYS
+    )
+    app.job_queue.run_daily(
+        night_buttons,
+        time=dt_time(hour=22, minute=30, tzinfo=IST),
+        days=ALL_DAYS
+    )
+    app.job_queue.run_repeating(flush_tick, interval=FLUSH_TICK, first=FLUSH_TICK)
+    # safety net for anything still in the journal
+    app.job_queue.run_daily(
+        flush_edits_job,
+        time=dt_time(hour=23, minute=55, tzinfo=IST),
+        days=ALL_DAYS
+    )
+    app.job_queue.run_once(startup_checks, when=0)
+    return app
 # ================= START =================
-logging.info("Bot running...")
-app.run_polling(drop_pending_updates=True)
+def main():
+    app = build_app()
+    logging.info("Bot running...")
+    app.run_polling(drop_pending_updates=True)
+# ================= STARTUP PROFILE =================
+def _import_times():
+    # python -X importtime in a fresh interpreter:
+    # "import time: self [us] | cumulative | <2 spaces per level>name"
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import scheduler"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    ).stderr
+    times = []
+    for line in out.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        depth = (len(parts[2]) - len(parts[2].lstrip()) - 1) // 2
+        times.append((int(parts[1]) / 1000, int(parts[0]) / 1000, depth, parts[2].strip()))
+    return times
+def profile_startup():
+    # python scheduler.py --profile-startup: where cold start time goes
+    times = _import_times()
+    # children are listed before their parent: scheduler's direct imports
+    # are the depth 1 lines right above it
+    end = next((i for i, t in enumerate(times) if t[3] == "scheduler"), len(times))
+    start = end
+    while start > 0 and times[start - 1][2] > 0:
+        start -= 1
+    imports_ms = times[end][0] if end < len(times) else 0.0
+    direct = [t for t in times[start:end] if t[2] == 1]
+    print("📦 Imports (cumulative / self ms), heaviest first:")
+    for cum, own, depth, name in sorted(direct, reverse=True)[:15]:
+        print(f"  {cum:8.1f}  {own:8.1f}  {name}")
+    steps = []
+    started = time.perf_counter()
+    for name, step in (
+        ("users", get_registry),
+        ("state", get_state),
+        ("app", build_app),
+    ):
+        t = time.perf_counter()
+        step()
+        steps.append((name, (time.perf_counter() - t) * 1000))
+    setup_ms = (time.perf_counter() - started) * 1000
+    sync_worker.stop()
+    metrics.stop_http()
+    shutil.rmtree(os.environ["DATA_DIR"], ignore_errors=True)
+    print("⚙️ Setup before polling (ms):")
+    for name, ms in steps:
+        print(f"  {ms:8.1f}  {name}")
+    total = imports_ms + setup_ms
+    verdict = "✅ within" if total <= STARTUP_BUDGET_MS else "❌ over"
+    print(f"⏱ Startup {total:.0f} ms ({imports_ms:.0f} imports + {setup_ms:.0f} setup), "
+          f"{verdict} the {STARTUP_BUDGET_MS} ms budget")
+    return total <= STARTUP_BUDGET_MS
+# render workers are spawned and re-import this module, only the real
+# entry point may start the bot
+if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        sys.exit(0 if profile_startup() else 1)
+    main()
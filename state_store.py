@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from config import STATE_DB, CHAT_ID
+
+# ================= STATE STORE =================
+# Small key -> JSON value store for bot state (who is being asked for a
+# hard topic, ...). Reads come from an in-memory dict. Each write is one
+# SQLite WAL commit of that key only, so a crash loses nothing that was
+# acknowledged and can never leave a half-written file behind.
+# Values are plain JSON data; set() a new value instead of mutating the
+# one get() returned.
+LEGACY_STATE_FILE = "bot_state.json"
+
+
+class StateStore:
+    def __init__(self, path=STATE_DB):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # FULL: in WAL mode NORMAL can lose the last commits on power loss,
+        # and a write here is acknowledged to the user
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL)"
+        )
+        self.conn.commit()
+        self._cache = {
+            key: json.loads(value)
+            for key, value in self.conn.execute("SELECT key, value FROM state")
+        }
+        self._locks = {}
+
+    def get(self, key, default=None):
+        return self._cache.get(key, default)
+
+    def keys(self, prefix=""):
+        # list() copies the keys in one step, so a reader thread is not
+        # broken by a write on the loop
+        return [key for key in list(self._cache) if key.startswith(prefix)]
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, values):
+        # several keys in one transaction
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO state (key, value) VALUES (?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                [(key, json.dumps(value)) for key, value in values.items()],
+            )
+        self._cache.update(values)
+
+    def delete(self, key):
+        if key not in self._cache:
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM state WHERE key = ?", (key,))
+        del self._cache[key]
+
+    def lock(self, key):
+        # for read-check-write sequences that await in between
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def import_json(self, path):
+        # one-off migration of the old bot_state.json
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            logging.exception("Could not read old state file %s, skipping it", path)
+            return
+        values = {}
+        for key, value in data.items():
+            if key != "awaiting_hard_topic":
+                values[key] = value
+            elif isinstance(value, dict):
+                values.update({awaiting_key(chat): flag for chat, flag in value.items() if flag})
+            elif value and CHAT_ID is not None:
+                values[awaiting_key(CHAT_ID)] = True
+        if values:
+            self.update(values)
+        os.replace(path, path + ".migrated")
+        logging.info("Imported %s keys from %s", len(values), path)
+
+
+def awaiting_key(chat_id):
+    return f"awaiting_hard_topic:{chat_id}"
+
+
+_STORE = None
+
+
+def get_state():
+    global _STORE
+    if _STORE is None:
+        _STORE = StateStore()
+        if os.path.exists(LEGACY_STATE_FILE):
+            _STORE.import_json(LEGACY_STATE_FILE)
+    return _STORE
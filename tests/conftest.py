@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Everything the bot persists lives under DATA_DIR (config.py reads it on
+# import), so the tests get a scratch one before any bot module loads.
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="plan-bot-tests-")
+os.environ["CHAT_ID"] = ""  # no owner plan
+os.environ.setdefault("DRIVE_FOLDER_ID", "folder")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
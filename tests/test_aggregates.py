@@ -0,0 +1,102 @@
+import itertools
+import os
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import scheduler
+from aggregates import aggregates_key, aggregates_match, plan_aggregates, recompute, summary
+from benchmark import generate_plan
+from config import DATA_DIR, PLAN_TEMPLATE
+from plan_model import load_plan
+from state_store import get_state
+from users import get_registry
+
+# Answers replayed through scheduler.record_edit, the path the bot's
+# handlers take, must leave the incrementally kept aggregates equal to a
+# full recompute() of the plan.
+TOPICS = ("Pointers", "pointers ", "Pointer", "Recursion", "recursions", "Graphs", "None", "DP: knapsack")
+_chat_ids = itertools.count(1000)
+
+
+def _saved(path):
+    state = get_state()
+    key = aggregates_key(path)
+    return state.get(key), {bucket: state.get(bucket) for bucket in state.keys(key + ":")}
+
+
+def assert_matches_recompute(path):
+    plan = load_plan(path)
+    agg, buckets = _saved(path)
+    fresh, fresh_buckets = recompute(plan)
+    assert summary(agg) == summary(fresh)
+    assert buckets == fresh_buckets
+    assert aggregates_match(plan)
+
+
+def answer(monkeypatch, user, d, rng):
+    # one day's answers, changed minds included
+    monkeypatch.setattr(scheduler, "today_ist", lambda: d)
+    for _ in range(rng.randint(1, 4)):
+        if rng.random() < 0.6:
+            scheduler.update_status_in_word(user, rng.choice(("✅", "❌")))
+        else:
+            scheduler.record_edit(user, "hard topic", rng.choice(TOPICS))
+
+
+def replay(monkeypatch, user, first, days, rng):
+    d = first
+    for _ in range(days):
+        answer(monkeypatch, user, d, rng)
+        if rng.random() < 0.1:
+            # a late answer for an earlier day
+            answer(monkeypatch, user, d - timedelta(days=rng.randint(1, 3)), rng)
+        d += timedelta(days=rng.choice((1, 1, 1, 2)))  # some days go unanswered
+    return d
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_template_plan(monkeypatch, seed):
+    start = date(2026, 1, 12)
+    user = get_registry().register(next(_chat_ids), start)
+    plan_aggregates(load_plan(user.plan_path))
+    rng = random.Random(seed)
+    replay(monkeypatch, user, start, 20, rng)
+    assert_matches_recompute(user.plan_path)
+
+
+@pytest.fixture(scope="module")
+def long_plan():
+    # a year of generated history, with a month of empty rows after today
+    path = os.path.join(DATA_DIR, "long_plan.docx")
+    today = date(2026, 6, 1)
+    generate_plan(path, 1, today, PLAN_TEMPLATE)
+    return path, today
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_long_plan_with_history(monkeypatch, long_plan, seed):
+    template, today = long_plan
+    chat_id = next(_chat_ids)
+    path = os.path.join(DATA_DIR, f"long_{chat_id}.docx")
+    with open(template, "rb") as src, open(path, "wb") as dest:
+        dest.write(src.read())
+    user = get_registry().add(chat_id, path, today - timedelta(days=335), f"long_{chat_id}.docx")
+    plan_aggregates(load_plan(path))
+    rng = random.Random(seed)
+    replay(monkeypatch, user, today + timedelta(days=1), 25, rng)
+    assert_matches_recompute(path)
+
+
+def test_undone_answer_that_began_a_run(monkeypatch):
+    start = date(2026, 1, 12)
+    user = get_registry().register(next(_chat_ids), start)
+    plan_aggregates(load_plan(user.plan_path))
+    for day, status in ((0, "✅"), (1, "✅"), (2, "❌"), (3, "✅"), (3, "❌")):
+        monkeypatch.setattr(scheduler, "today_ist", lambda day=day: start + timedelta(days=day))
+        scheduler.update_status_in_word(user, status)
+    agg, _ = _saved(user.plan_path)
+    assert agg["run"] is None
+    assert summary(agg)[-1] == 2
+    assert_matches_recompute(user.plan_path)
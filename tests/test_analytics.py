@@ -0,0 +1,35 @@
+import os
+from datetime import date
+
+import pytest
+
+from aggregates import plan_aggregates
+from analytics import PlanMetrics, compute_metrics, metrics_from_aggregates
+from benchmark import generate_plan
+from config import DATA_DIR, PLAN_TEMPLATE
+from plan_model import load_plan
+from users import get_registry
+
+# compute_metrics (one pass over every row, pure Python or the numpy
+# columns) is the reference for the numbers the reports now read from
+# metrics_from_aggregates.
+FIELDS = [name for name in PlanMetrics.__slots__ if name not in ("start", "end")]
+
+
+@pytest.fixture(scope="module")
+def plan():
+    path = os.path.join(DATA_DIR, "analytics_plan.docx")
+    generate_plan(path, 2, date(2026, 6, 15), PLAN_TEMPLATE, seed=7)
+    get_registry().add(4000, path, date(2024, 7, 15), "analytics_plan.docx")
+    return load_plan(path)
+
+
+@pytest.mark.parametrize("columnar", [False, True], ids=["python", "numpy"])
+@pytest.mark.parametrize("today", [date(2026, 6, 15), date(2026, 3, 1), date(2025, 12, 31)])
+def test_aggregates_match_reference(plan, today, columnar):
+    if columnar:
+        pytest.importorskip("numpy")
+    reference = compute_metrics(plan.rows, today, columnar=columnar)
+    fast = metrics_from_aggregates(plan, plan_aggregates(plan), today)
+    for name in FIELDS:
+        assert getattr(fast, name) == getattr(reference, name), name
@@ -0,0 +1,97 @@
+import json
+import os
+
+import pytest
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+
+import drive
+from config import DATA_DIR
+
+# upload_to_drive against a Drive client whose HTTP layer is a
+# HttpMockSequence: the test lists Drive's answers and checks which calls
+# the upload made.
+FOLDER = os.environ["DRIVE_FOLDER_ID"]
+NAME = "plan.docx"
+KEY = f"{FOLDER}/{NAME}"
+
+
+def ok(body):
+    return {"status": "200"}, json.dumps(body)
+
+
+def calls(http):
+    # (method, path) of every request, query strings dropped
+    return [(method, uri.split("?")[0].split("googleapis.com")[1]) for uri, method, _, _ in http.request_sequence]
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    path = tmp_path / NAME
+    path.write_bytes(b"plan bytes")
+    return str(path)
+
+
+@pytest.fixture
+def drive_http(monkeypatch):
+    # returns a function setting up Drive's answers and the id cache
+    monkeypatch.setattr(drive, "DRIVE_ID_CACHE", os.path.join(DATA_DIR, "test_drive_ids.json"))
+    monkeypatch.setattr(drive.time, "sleep", lambda seconds: None)
+
+    def setup(responses, cached=None):
+        http = HttpMockSequence(list(responses))
+        service = build("drive", "v3", http=http, static_discovery=True)
+        monkeypatch.setattr(drive, "get_drive_service", lambda: service)
+        monkeypatch.setattr(drive, "_FILE_IDS", {KEY: cached} if cached else {})
+        return http
+
+    return setup
+
+
+def test_cached_id_is_one_update(drive_http, local_file):
+    http = drive_http([ok({"id": "abc", "md5Checksum": "new"})], cached={"id": "abc", "md5": "old"})
+    assert drive.upload_to_drive(local_file, NAME)
+    assert calls(http) == [("PATCH", "/upload/drive/v3/files/abc")]
+    assert drive._FILE_IDS[KEY] == {"id": "abc", "md5": "new"}
+
+
+def test_stale_id_is_looked_up_and_updated(drive_http, local_file):
+    http = drive_http(
+        [
+            ({"status": "404"}, json.dumps({"error": {"code": 404, "message": "File not found"}})),
+            ok({"files": [{"id": "def"}]}),
+            ok({"id": "def", "md5Checksum": "new"}),
+        ],
+        cached={"id": "abc", "md5": "old"},
+    )
+    assert drive.upload_to_drive(local_file, NAME)
+    assert calls(http) == [
+        ("PATCH", "/upload/drive/v3/files/abc"),
+        ("GET", "/drive/v3/files"),
+        ("PATCH", "/upload/drive/v3/files/def"),
+    ]
+    assert drive._FILE_IDS[KEY] == {"id": "def", "md5": "new"}
+
+
+def test_stale_id_and_no_file_creates_one(drive_http, local_file):
+    http = drive_http(
+        [
+            ({"status": "404"}, json.dumps({"error": {"code": 404, "message": "File not found"}})),
+            ok({"files": []}),
+            ok({"id": "ghi", "md5Checksum": "new"}),
+        ],
+        cached={"id": "abc", "md5": "old"},
+    )
+    assert drive.upload_to_drive(local_file, NAME)
+    assert calls(http) == [
+        ("PATCH", "/upload/drive/v3/files/abc"),
+        ("GET", "/drive/v3/files"),
+        ("POST", "/upload/drive/v3/files"),
+    ]
+    assert drive._FILE_IDS[KEY] == {"id": "ghi", "md5": "new"}
+
+
+def test_same_md5_makes_no_calls(drive_http, local_file):
+    http = drive_http([], cached={"id": "abc", "md5": drive.file_md5(local_file)})
+    assert drive.upload_to_drive(local_file, NAME)
+    assert http.request_sequence == []
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+import scheduler
+from broadcast import TokenBucket, broadcaster
+from fake_bot import FakeBot, FakeContext
+
+CHATS = range(1, 61)
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits(monkeypatch):
+    monkeypatch.setattr(broadcaster, "bucket", TokenBucket(1e9, 1e9))
+    monkeypatch.setattr(broadcaster, "per_chat_rate", 1e9)
+    monkeypatch.setattr(broadcaster, "per_chat_burst", 1e9)
+    broadcaster._chats.clear()
+
+
+class AnsweringBot(FakeBot):
+    # chat `answers` taps Yes while the reminder to chat `during` goes out
+    def __init__(self, context, answers, during):
+        super().__init__()
+        self.context = context
+        self.answers = answers
+        self.during = during
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id == self.during:
+            self.context.bot_data["evening_pending"].pop(self.answers, None)
+        return await super().send_message(chat_id, text, **kwargs)
+
+
+def test_yes_during_the_fan_out_keeps_the_retry():
+    ctx = FakeContext()
+    ctx.bot = AnsweringBot(ctx, answers=1, during=30)
+    pending = ctx.bot_data["evening_pending"] = {chat_id: 0 for chat_id in CHATS}
+    asyncio.run(scheduler.send_evening(ctx, pending))
+    assert len(ctx.bot.sent) == len(CHATS)
+    assert 1 not in pending
+    assert all(pending[chat_id] == 1 for chat_id in CHATS if chat_id != 1)
+    assert len(ctx.job_queue.get_jobs_by_name(scheduler.EVENING_RETRY_JOB)) == 1
+
+
+def test_retry_stops_after_the_last_reminder():
+    ctx = FakeContext()
+    pending = ctx.bot_data["evening_pending"] = {chat_id: 0 for chat_id in CHATS}
+    asyncio.run(scheduler.send_evening(ctx, pending))
+    asyncio.run(ctx.run_job(ctx.job_queue.get_jobs_by_name(scheduler.EVENING_RETRY_JOB)[0]))
+    assert len(ctx.bot.sent) == 2 * len(CHATS)
+    assert pending == {}
+    assert ctx.job_queue.get_jobs_by_name(scheduler.EVENING_RETRY_JOB) == []
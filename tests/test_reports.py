@@ -0,0 +1,38 @@
+import asyncio
+import itertools
+from datetime import date
+
+import pytest
+
+import reports
+from broadcast import TokenBucket, broadcaster
+from fake_bot import FakeContext
+from report_cache import report_cache
+from users import get_registry
+
+_chat_ids = itertools.count(3000)
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits(monkeypatch):
+    monkeypatch.setattr(broadcaster, "bucket", TokenBucket(1e9, 1e9))
+    monkeypatch.setattr(broadcaster, "per_chat_rate", 1e9)
+    monkeypatch.setattr(broadcaster, "per_chat_burst", 1e9)
+    broadcaster._chats.clear()
+
+
+def test_cold_report_counts_misses_only_then_reuses_file_id():
+    user = get_registry().register(next(_chat_ids), date(2026, 1, 12))
+    report_cache.clear()
+    report_cache.hits = report_cache.misses = 0
+    ctx = FakeContext()
+
+    asyncio.run(reports.send_weekly_report(ctx, user))
+    # metrics and PDF both rendered; storing the file_id is not a lookup
+    assert (report_cache.hits, report_cache.misses) == (0, 2)
+    first = ctx.bot.sent[-1].kwargs["document"]
+    assert isinstance(first, bytes)
+
+    asyncio.run(reports.send_weekly_report(ctx, user))
+    assert (report_cache.hits, report_cache.misses) == (2, 2)
+    assert ctx.bot.sent[-1].kwargs["document"] == "fake-file-1"
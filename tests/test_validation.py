@@ -0,0 +1,38 @@
+import pytest
+from docx import Document
+
+import scheduler
+from config import PLAN_TEMPLATE
+
+
+def test_template_is_valid():
+    scheduler.validate_word_structure(PLAN_TEMPLATE)
+
+
+def test_table_without_header_row_fails(tmp_path):
+    doc = Document(PLAN_TEMPLATE)
+    table = doc.add_table(rows=2, cols=3)
+    table.cell(1, 0).text = "2026-01-12"
+    path = str(tmp_path / "extra_table.docx")
+    doc.save(path)
+    with pytest.raises(RuntimeError, match="no header row"):
+        scheduler.validate_word_structure(path)
+
+
+def test_missing_column_fails(tmp_path):
+    doc = Document(PLAN_TEMPLATE)
+    for table in doc.tables:
+        for cell in table.rows[0].cells:
+            if cell.text.strip().lower() == "hard topic":
+                cell.text = "Notes"
+    path = str(tmp_path / "no_hard_topic.docx")
+    doc.save(path)
+    with pytest.raises(RuntimeError):
+        scheduler.validate_word_structure(path)
+
+
+def test_no_tables_fails(tmp_path):
+    path = str(tmp_path / "empty.docx")
+    Document().save(path)
+    with pytest.raises(RuntimeError, match="no tables"):
+        scheduler.validate_word_structure(path)
@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from config import USERS_DB, PLANS_DIR, PLAN_TEMPLATE, WORD_FILE, CHAT_ID, START_DATE
+from plan_model import find_headers, parse_day, import_plan
+
+# ================= USERS =================
+# One row per registered chat: where its plan document lives, the day the
+# plan started and the name its copy gets on Drive. Loaded into memory once;
+# the reminder ticks walk the in-memory list, the database only sees writes.
+
+
+class User:
+    __slots__ = ("chat_id", "plan_path", "start_date", "drive_name")
+
+    def __init__(self, chat_id, plan_path, start_date, drive_name):
+        self.chat_id = chat_id
+        self.plan_path = plan_path
+        self.start_date = start_date
+        self.drive_name = drive_name
+
+    def day_number(self, today):
+        if today < self.start_date:
+            return None
+        return (today - self.start_date).days + 1
+
+
+def write_plan_copy(template, dest, start_date):
+    # the template's day column stays, dates are laid out from start_date
+    from docx import Document
+    doc = Document(template)
+    for table in doc.tables:
+        headers, header_idx = find_headers(table)
+        if not headers or "day" not in headers:
+            continue
+        for row in table.rows[header_idx + 1:]:
+            cells = row.cells
+            day = parse_day(cells[headers["day"]].text)
+            if day is not None:
+                cells[headers["date"]].text = (start_date + timedelta(days=day - 1)).isoformat()
+    tmp_path = dest + ".tmp"
+    doc.save(tmp_path)
+    os.replace(tmp_path, dest)
+
+
+class UserRegistry:
+    def __init__(self, path=USERS_DB):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            " chat_id INTEGER PRIMARY KEY,"
+            " plan_path TEXT NOT NULL,"
+            " start_date TEXT NOT NULL,"
+            " drive_name TEXT NOT NULL,"
+            " registered REAL NOT NULL)"
+        )
+        self.conn.commit()
+        # /start registers on a worker thread; registrations are serialized
+        self._lock = threading.RLock()
+        self._users = {}
+        self._by_plan = {}
+        for chat_id, plan_path, start_date, drive_name in self.conn.execute(
+            "SELECT chat_id, plan_path, start_date, drive_name FROM users"
+        ):
+            self._add(User(
+                chat_id,
+                plan_path,
+                datetime.strptime(start_date, "%Y-%m-%d").date(),
+                drive_name,
+            ))
+
+    def _add(self, user):
+        self._users[user.chat_id] = user
+        self._by_plan[user.plan_path] = user
+        return user
+
+    def get(self, chat_id):
+        return self._users.get(chat_id)
+
+    def by_plan(self, path):
+        return self._by_plan.get(path)
+
+    def all(self):
+        return list(self._users.values())
+
+    def add(self, chat_id, plan_path, start_date, drive_name):
+        with self._lock:
+            old = self._users.get(chat_id)
+            if old is not None:
+                self._by_plan.pop(old.plan_path, None)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO users"
+                " (chat_id, plan_path, start_date, drive_name, registered)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (chat_id, plan_path, start_date.isoformat(), drive_name, time.time()),
+            )
+            self.conn.commit()
+            return self._add(User(chat_id, plan_path, start_date, drive_name))
+
+    def register(self, chat_id, start_date, template=PLAN_TEMPLATE):
+        with self._lock:
+            user = self._users.get(chat_id)
+            if user is not None:
+                return user  # a second /start sent before the first finished
+            os.makedirs(PLANS_DIR, exist_ok=True)
+            plan_path = os.path.join(PLANS_DIR, f"{chat_id}.docx")
+            write_plan_copy(template, plan_path, start_date)
+            import_plan(plan_path)
+            return self.add(chat_id, plan_path, start_date, f"placepment_plan_{chat_id}.docx")
+
+    def ensure_owner(self):
+        # the pre-registration single user keeps its file and Drive name
+        if CHAT_ID is not None and CHAT_ID not in self._users:
+            self.add(
+                CHAT_ID,
+                WORD_FILE,
+                datetime.strptime(START_DATE, "%Y-%m-%d").date(),
+                "placepment_plan.docx",
+            )
+
+
+_REGISTRY = None
+
+
+def get_registry():
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = UserRegistry()
+        _REGISTRY.ensure_owner()
+    return _REGISTRY